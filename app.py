@@ -1,8 +1,18 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
+import os
+import time
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import chapters
+import explorer
+import matchups
+import scoring
+from context import run_tasks
+from engines import get_engine
+from constructors import dominance_index, driver_team_share
+from serialization import payload_size
 
 # ==========================================
 # CONFIGURAÇÃO VISUAL (GLASSMORPHISM LIGHT)
@@ -162,9 +172,19 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Paleta de Cores Atualizada
-CORES = {'Lewis Hamilton': '#7C3AED', 'Max Verstappen': '#2563EB', 
-         'Hamilton': '#7C3AED', 'Verstappen': '#2563EB'}
+# Pilotos do duelo (driverId)
+PILOTOS = (1, 830)
+
+# Workers para preparar os capítulos em paralelo (0 = sequencial, o padrão)
+WORKERS = int(os.environ.get('DUELO_WORKERS', 0))
+# Tipo do pool: 'thread' ou 'process' (processos contornam o GIL nos groupbys e no plotly)
+POOL = os.environ.get('DUELO_POOL', 'thread')
+
+# Janela padrão da forma recente (já preparada junto com os dados)
+JANELA_PADRAO = 10
+
+# Motor de dataframe da preparação de dados ('pandas' ou 'polars', ver engines.py)
+ENGINE = os.environ.get('DUELO_ENGINE', 'pandas')
 
 # ==========================================
 # 1. CARREGAMENTO E TRATAMENTO DE DADOS
@@ -178,7 +198,11 @@ def load_data():
         try:
             sprint_results = pd.read_csv('sprint_results.csv')
         except:
-            sprint_results = pd.DataFrame(columns=['resultId', 'raceId', 'driverId', 'points'])
+            # Sem sprints: tabela vazia com o cabeçalho (e os tipos) do sprint_results.csv
+            sprint_results = results.iloc[:0][['resultId', 'raceId', 'driverId', 'constructorId', 'number',
+                                               'grid', 'position', 'positionText', 'positionOrder', 'points',
+                                               'laps', 'time', 'milliseconds', 'fastestLap', 'fastestLapTime',
+                                               'statusId']]
 
         return results, drivers, races, sprint_results
     except Exception as e:
@@ -187,13 +211,89 @@ def load_data():
 
 results, drivers, races, sprint_results = load_data()
 
-# Prepara DataFrame Principal
-if results is not None:
-    df = results.merge(drivers[['driverId', 'forename', 'surname']], on='driverId', how='left')
-    df = df.merge(races[['raceId', 'year', 'date', 'round', 'name']], on='raceId', how='left')
-    df['nome_piloto'] = df['forename'] + ' ' + df['surname']
-    df = df[df['driverId'].isin([1, 830])].copy()
-    df['pos_change'] = df.apply(lambda x: x['grid'] - x['positionOrder'] if x['grid'] > 0 else 0, axis=1)
+@st.cache_resource
+def load_pool():
+    # Pool compartilhado entre sessões: preparo dos dados, agregados do contexto e gráficos
+    if WORKERS <= 0:
+        return None
+    # Processos via fork: os workers herdam os módulos já importados. Com spawn/forkserver eles
+    # reexecutariam o app.py (o Streamlit roda o script como __main__); sem fork (Windows), threads.
+    if POOL == 'process' and 'fork' in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('fork'))
+    return ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='capitulo')
+
+@st.cache_resource
+def load_preparo():
+    # Tudo que independe dos filtros, preparado de uma vez (ao mesmo tempo, com o pool).
+    # Tabelas somente leitura, compartilhadas entre sessões sem cópia.
+    results, drivers, races, sprint_results = load_data()
+    constructors = pd.read_csv('constructors.csv')
+    engine = get_engine(ENGINE)
+    return run_tasks({
+        'base': (engine.prepare, results, drivers, races, sprint_results),
+        # Transições grid → chegada de TODOS os pilotos por temporada
+        'transicoes': (engine.transitions, results, races),
+        # Histogramas de posição por (piloto, temporada): base de qualquer sistema de pontos
+        'pontuacao': (engine.histograms, results, sprint_results, races),
+        'forma': (engine.form, results, races, JANELA_PADRAO),
+        # Agregado (temporada, construtor) em um único groupby; pilotos ligados pela chave
+        'equipes': (engine.team_seasons, results, sprint_results, races, constructors),
+    }, load_pool())
+
+def load_base():
+    # Merges e colunas derivadas de todos os resultados: independem dos filtros
+    return load_preparo()['base']
+
+def load_transicoes():
+    return load_preparo()['transicoes']
+
+@st.cache_data(max_entries=64)
+def load_contexto(anos, driver_ids):
+    # Um único recorte (período, pilotos) por rerun, consumido por todos os capítulos
+    base, sprints = load_base()
+    return get_engine(ENGINE).context(base, sprints, anos, driver_ids, executor=load_pool(),
+                                      transicoes=load_transicoes())
+
+@st.cache_data
+def pontuar(sistema):
+    # Re-pontua todas as temporadas (None = pontos originais) e monta a classificação
+    sistema = scoring.SISTEMAS.get(sistema)
+    return scoring.standings(scoring.score(load_preparo()['pontuacao'], sistema))
+
+@st.cache_data(max_entries=16)
+def load_forma(n):
+    # Janelas móveis das últimas n corridas de TODOS os pilotos, uma tabela por n
+    if n == JANELA_PADRAO:
+        return load_preparo()['forma']
+    results, _, races, _ = load_data()
+    return get_engine(ENGINE).form(results, races, n)
+
+@st.cache_data
+def load_equipes():
+    team_seasons = load_preparo()['equipes']
+    return team_seasons, dominance_index(team_seasons)
+
+@st.cache_resource
+def load_confrontos():
+    # Loja pré-calculada e mapeada em memória (python build_matchups.py); criada aqui se
+    # faltar e atualizada (incremental) se os CSVs tiverem temporadas ou etapas novas
+    results, drivers, races, sprint_results = load_data()
+    return matchups.open_store(matchups.ARQUIVO, results, sprint_results, races, drivers)
+
+@st.cache_resource
+def load_engine():
+    # Banco colunar em memória compartilhado por todas as sessões (somente leitura)
+    return explorer.build_engine(explorer.load_snapshot())
+
+@st.cache_data
+def load_esquema():
+    return explorer.schema(load_engine())
+
+@st.cache_data(ttl=3600, max_entries=256)
+def consultar(sql):
+    inicio = time.perf_counter()
+    resultado, truncado = explorer.run_query(load_engine(), sql)
+    return resultado, truncado, (time.perf_counter() - inicio) * 1000
 
 # ==========================================
 # 2. BARRA LATERAL (SIDEBAR)
@@ -207,12 +307,14 @@ with st.sidebar:
     st.markdown("---")
     st.write("🎛️ **Filtros Globais**")
     filtro_anos = st.slider("Período de Análise:", 2014, 2025, (2015, 2025))
+    mostrar_payload = st.checkbox("📦 Mostrar tamanho dos gráficos", value=False)
     st.markdown("---")
     st.markdown("🔗 [**LinkedIn**](https://www.linkedin.com/in/ed-carlos-nunes-almeida-418767125/)")
     st.markdown("🔗 [**GitHub**](https://github.com/EdCarlosNunes)")
 
-# Aplica filtro de anos
-df_filtrado = df[(df['year'] >= filtro_anos[0]) & (df['year'] <= filtro_anos[1])]
+# Aplica filtro global: contexto único de análise para todos os capítulos
+if results is not None:
+    ctx = load_contexto(tuple(filtro_anos), PILOTOS)
 
 # ==========================================
 # 3. INTERFACE PRINCIPAL
@@ -236,43 +338,27 @@ st.markdown("""
 
 if results is not None:
     # Abas com Ícones
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10 = st.tabs([
         "📈 Trajetórias", 
         "🚀 Anatomia",
         "🏆 Pontos",
         "📊 Probabilidade",
         "🧠 Contexto", 
         "⚔️ Duelo Grid", 
-        "🏁 Veredito"
+        "🏭 Equipes",
+        "🆚 Confrontos",
+        "🏁 Veredito",
+        "🔎 Explorador"
     ])
 
-    # --- FUNÇÃO HELPER PARA LAYOUT DE GRÁFICO ---
-    def update_chart_layout(fig):
-        fig.update_layout(
-            template="plotly_white", 
-            hovermode="x unified",
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Inter", color="#000000", size=14), # PRETO PURO
-            title_font_color="#000000",
-            legend_title_font_color="#000000",
-            legend_font_color="#000000",
-            legend=dict(orientation="h", y=1.02, yanchor="bottom", x=0.5, xanchor="center")
-        )
-        fig.update_xaxes(
-            showgrid=False, 
-            color="#000000", 
-            title_font_color="#000000", 
-            tickfont_color="#000000"
-        )
-        fig.update_yaxes(
-            showgrid=True, 
-            gridcolor='rgba(0,0,0,0.1)', # Grade sutil escura
-            color="#000000", 
-            title_font_color="#000000", 
-            tickfont_color="#000000"
-        )
-        return fig
+    # --- FUNÇÃO HELPER PARA OS GRÁFICOS ---
+    # Cada gráfico é uma tarefa de chapters.py (dados + figura), submetida ao pool assim que
+    # seus dados e widgets são conhecidos. O lugar dele na página fica reservado e só é
+    # preenchido no fim do script, quando todas as tarefas terminaram.
+    graficos = []
+    def show_chart(fn, *args):
+        pool = load_pool()
+        graficos.append((st.container(), pool.submit(fn, *args) if pool else fn(*args)))
 
     # --- CAPÍTULO 1: TRAJETÓRIAS ---
     with tab1:
@@ -284,18 +370,21 @@ if results is not None:
         Note como a inclinação de Max (Azul) é, de fato, mais agressiva nos últimos 100 GPs do que a de Lewis (Roxo) no mesmo estágio de experiência, confirmando que seu domínio vai além do "carro dominante".
         """)
         
-        # Preparar dados
-        df_traj = df.sort_values(['driverId', 'year', 'round'])
-        df_traj['win'] = (df_traj['positionOrder'] == 1).astype(int)
-        df_traj['cum_wins'] = df_traj.groupby('driverId')['win'].cumsum()
-        df_traj['race_count'] = df_traj.groupby('driverId').cumcount() + 1
+        show_chart(chapters.trajectory_chart, ctx.traj)
+        
+        st.markdown("### Forma Recente (Janela Móvel)")
+        st.markdown("O acumulado esconde as oscilações. Aqui cada ponto resume apenas as **últimas N corridas** do piloto.")
         
-        fig1 = px.line(df_traj, x='race_count', y='cum_wins', color='nome_piloto',
-                       color_discrete_map=CORES,
-                       labels={'race_count': 'Número de GPs na Carreira', 'cum_wins': 'Vitórias Acumuladas'})
+        col_n, col_m = st.columns([1, 2])
+        with col_n:
+            janela = st.select_slider("Janela (corridas):", options=[5, 10, 15, 20, 30], value=JANELA_PADRAO)
+        with col_m:
+            rotulos = {'taxa_vitoria': 'Taxa de Vitória (%)', 'taxa_podio': 'Taxa de Pódio (%)',
+                       'chegada_media': 'Chegada Média', 'pontos_por_corrida': 'Pontos por Corrida'}
+            metrica = st.radio("Métrica:", list(rotulos), format_func=rotulos.get, horizontal=True)
         
-        fig1 = update_chart_layout(fig1)
-        st.plotly_chart(fig1, use_container_width=True)
+        show_chart(chapters.form_chart, load_forma(janela), ctx.driver_ids, ctx.anos, ctx.nomes,
+                   metrica, rotulos[metrica])
 
     # --- CAPÍTULO 2: ANATOMIA ---
     with tab2:
@@ -307,57 +396,36 @@ if results is not None:
         col_a, col_b = st.columns(2)
         
         with col_a:
-            fig2 = px.histogram(df_filtrado[df_filtrado['grid']>0], x="pos_change", color="nome_piloto",
-                                barmode="overlay", nbins=30, opacity=0.7,
-                                color_discrete_map=CORES,
-                                labels={'pos_change': 'Posições Ganhas/Perdidas'})
-            fig2.add_vline(x=0, line_dash="dash", line_color="#000000")
-            fig2 = update_chart_layout(fig2)
-            st.plotly_chart(fig2, use_container_width=True)
+            show_chart(chapters.position_change_chart, ctx.rows)
             
         with col_b:
-            top_rec = df.sort_values('pos_change', ascending=False).groupby('nome_piloto').head(5)
-            top_rec['Rotulo'] = top_rec['name'] + ' ' + top_rec['year'].astype(str)
-            
-            fig2b = px.bar(top_rec, x='pos_change', y='Rotulo', color='nome_piloto',
-                           orientation='h', color_discrete_map=CORES,
-                           text='pos_change')
-            
-            fig2b = update_chart_layout(fig2b)
-            fig2b.update_layout(showlegend=False, yaxis={'categoryorder':'total ascending'})
-            fig2b.update_traces(textfont_color='#000000', textfont_weight='bold') 
-            st.plotly_chart(fig2b, use_container_width=True)
+            show_chart(chapters.top_recoveries_chart, ctx.top_rec)
 
     # --- CAPÍTULO 3: PONTOS ---
     with tab3:
         st.subheader("Pontos Totais por Temporada")
         st.markdown("Comparativo absoluto de pontos somados por ano (incluindo Sprints e Voltas Rápidas).")
+        st.markdown("""
+        > *Ressalva:* cada época pontuou de um jeito (10-8-6 em 2008, 25-18-15 depois). Escolha um sistema abaixo para **re-pontuar todas as temporadas** sob a mesma régua.
+        """)
         
-        def get_total_points(driver_id):
-            df_res = results[results['driverId'] == driver_id].merge(races[['raceId', 'year']], on='raceId')
-            pts_race = df_res.groupby('year')['points'].sum().reset_index()
-            df_spr = sprint_results[sprint_results['driverId'] == driver_id].merge(races[['raceId', 'year']], on='raceId')
-            pts_spr = df_spr.groupby('year')['points'].sum().reset_index()
-            total = pd.merge(pts_race, pts_spr, on='year', how='left').fillna(0)
-            total['total'] = total['points_x'] + total['points_y']
-            return total[['year', 'total']]
-
-        ham_pts = get_total_points(1)
-        max_pts = get_total_points(830)
-        
-        fig3 = go.Figure()
-        fig3.add_trace(go.Scatter(x=ham_pts['year'], y=ham_pts['total'], mode='lines+markers+text',
-                                  name='Lewis Hamilton', line=dict(color='#7C3AED', width=3),
-                                  text=ham_pts['total'], textposition="top center",
-                                  textfont=dict(color='#000000', weight='bold')))
-        
-        fig3.add_trace(go.Scatter(x=max_pts['year'], y=max_pts['total'], mode='lines+markers+text',
-                                  name='Max Verstappen', line=dict(color='#2563EB', width=3),
-                                  text=max_pts['total'], textposition="top center",
-                                  textfont=dict(color='#000000', weight='bold')))
-        
-        fig3 = update_chart_layout(fig3)
-        st.plotly_chart(fig3, use_container_width=True)
+        original = "Original (regra de cada época)"
+        sistema = st.selectbox("Sistema de pontuação:", [original] + list(scoring.SISTEMAS))
+        pts = pontuar(None if sistema == original else sistema)
+        pts = pts[pts['driverId'].isin(ctx.driver_ids) & pts['year'].between(*ctx.anos)]
+        pts = pts.rename(columns={'pontos': 'total'})
+        show_chart(chapters.points_chart, pts)
+        
+        st.markdown("#### Posição no Campeonato")
+        # Posição só faz sentido em temporadas completas no dataset (mesmo critério do capítulo Equipes)
+        _, dominio = load_equipes()
+        completos = dominio.loc[dominio['equipes'] > 2, 'year']
+        classificacao = pts[pts['year'].isin(completos)]
+        classificacao = classificacao.assign(piloto=classificacao['driverId'].map(ctx.nomes),
+                                             posicao='P' + classificacao['posicao'].astype(str))
+        classificacao = classificacao.pivot(index='piloto', columns='year', values='posicao')
+        st.dataframe(classificacao, use_container_width=True)
+        st.caption("Volta mais rápida só está registrada a partir de 2004. Temporadas incompletas no dataset (ex.: 2025, só com os dois pilotos) ficam fora da classificação.")
 
     # --- CAPÍTULO 4: PROBABILIDADE ---
     with tab4:
@@ -365,20 +433,7 @@ if results is not None:
         st.markdown("Taxa de conversão de Max Verstappen por posição de largada (frequência relativa).")
         
         max_id = 830
-        max_results = results[results['driverId'] == max_id].copy()
-        max_results['is_podium'] = (max_results['positionOrder'] <= 3).astype(int)
-        grid_stats = max_results.groupby('grid').agg(total=('raceId', 'count'), podios=('is_podium', 'sum')).reset_index()
-        grid_stats['chance'] = (grid_stats['podios'] / grid_stats['total']) * 100
-        grid_stats = grid_stats[grid_stats['grid'] <= 20]
-        
-        fig4 = px.bar(grid_stats, x='grid', y='chance', 
-                      color_discrete_sequence=['#2563EB'],
-                      text=grid_stats.apply(lambda x: f"{x['chance']:.0f}%", axis=1),
-                      labels={'grid': 'Posição de Largada', 'chance': 'Chance de Pódio (%)'})
-        
-        fig4 = update_chart_layout(fig4)
-        fig4.update_traces(textfont_color='#000000', textfont_weight='bold')
-        st.plotly_chart(fig4, use_container_width=True)
+        show_chart(chapters.podium_chance_chart, ctx.grid, max_id)
 
     # --- CAPÍTULO 5: CONTEXTO (NOVO!) ---
     with tab5:
@@ -396,41 +451,13 @@ if results is not None:
         Os dados mostram visualmente a dispersão de Max (Azul) para a direita (largando de trás) e para baixo (chegando na frente), confirmando a consistência dessas recuperações.
         """)
         
-        # Gráfico de Dispersão: Grid vs Finish
-        try:
-            fig_ctx = px.scatter(df, x="grid", y="positionOrder", color="nome_piloto",
-                                 color_discrete_map=CORES,
-                                 hover_data=['name', 'year'],
-                                 labels={'grid': 'Largada (Grid)', 'positionOrder': 'Chegada (Final)'},
-                                 trendline="ols") # Tenta adicionar linha de tendência
-        except Exception as e:
-            # Fallback seguro caso statsmodels falhe ou grid/dados sejam insuficientes
-            fig_ctx = px.scatter(df, x="grid", y="positionOrder", color="nome_piloto",
-                                 color_discrete_map=CORES,
-                                 hover_data=['name', 'year'],
-                                 labels={'grid': 'Largada (Grid)', 'positionOrder': 'Chegada (Final)'})
-        
-        fig_ctx.add_shape(type="line", x0=1, y0=1, x1=20, y1=20,
-                          line=dict(color="Gray", width=1, dash="dash"))
-        
-        fig_ctx.update_layout(yaxis=dict(autorange="reversed")) # Inverter Y para 1º lugar ficar no topo
-        fig_ctx = update_chart_layout(fig_ctx)
-        st.plotly_chart(fig_ctx, use_container_width=True)
+        show_chart(chapters.grid_finish_chart, ctx.rows)
         
         st.markdown("### Eficiência de Conversão: Largando do Pelotão (P4+)")
         st.markdown("Quantas vezes eles venceram largando **fora do Top 3**? A estatística crua:")
         
-        # Tabela de Eficiência
-        # Filtra corridas largando >= 4
-        df_mid = df[df['grid'] >= 4]
-        stats_mid = df_mid.groupby('nome_piloto').agg(
-            corridas=('raceId', 'count'),
-            vitorias=('positionOrder', lambda x: (x==1).sum()),
-            podios=('positionOrder', lambda x: (x<=3).sum())
-        ).reset_index()
-        
-        stats_mid['win_rate'] = (stats_mid['vitorias'] / stats_mid['corridas']) * 100
-        stats_mid['podium_rate'] = (stats_mid['podios'] / stats_mid['corridas']) * 100
+        # Tabela de Eficiência (corridas largando >= 4, já agregada no contexto)
+        stats_mid = ctx.stats_mid
         
         # Exibir como métricas
         col1, col2 = st.columns(2)
@@ -455,34 +482,115 @@ if results is not None:
         st.subheader("Duelo de Resiliência")
         st.markdown(" Comparativo direto de chance de pódio por posição de largada.")
         
-        df_chart5_data = df.copy()
-        df_chart5_data['is_podium'] = df_chart5_data['positionOrder'].apply(lambda x: 1 if x <= 3 else 0)
+        # Chance de pódio por largada, já cruzada com o template no contexto (texto montado no navegador)
+        sobrenomes = ctx.sobrenomes
+        
+        show_chart(chapters.grid_duel_chart, ctx.duelo)
+        
+        st.markdown("### Matriz de Transição: Largada → Chegada")
+        st.markdown("Perfil completo de cada piloto: para cada posição de largada, a distribuição de onde ele terminou. A **resiliência** é a chance de pódio largando de P4 para trás.")
+        
+        col_ham, col_max = st.columns(2)
+        for col, (driver_id, surname) in zip([col_ham, col_max], sobrenomes.items()):
+            with col:
+                show_chart(chapters.transition_heatmap, ctx.counts, driver_id, surname)
+                
+                resumo = ctx.resumo[ctx.resumo['driverId'] == driver_id]
+                if not resumo.empty:
+                    r = resumo.iloc[0]
+                    st.metric(f"{surname}: Resiliência (pódio largando > P3)", f"{r['resiliencia']:.1f}%",
+                              f"Chegada média P{r['chegada_esperada']:.1f} (σ² {r['variancia']:.1f})")
+
+    # --- CAPÍTULO 7: EQUIPES ---
+    with tab7:
+        st.subheader("O Peso do Carro")
+        st.markdown("""
+        > *O contra-argumento clássico:* "Isso não é era de piloto, é era de carro."
         
-        grids_all = pd.DataFrame({'grid': range(1, 21)})
-        pilotos_all = pd.DataFrame({'surname': ['Hamilton', 'Verstappen']})
-        template_df = pd.merge(pilotos_all.assign(key=1), grids_all.assign(key=1), on='key').drop('key', axis=1)
+        Aqui separamos as duas coisas. À esquerda, a fatia de cada piloto nos pontos **da própria equipe** (quanto ele extrai do carro em relação ao companheiro).
+        À direita, a fatia da equipe nos pontos **da temporada** (quão dominante era o carro).
+        """)
         
-        stats_real = df_chart5_data.groupby(['surname', 'grid']).agg(
-            total_largadas=('raceId', 'count'),
-            total_podios=('is_podium', 'sum')
-        ).reset_index()
+        team_seasons, dominio = load_equipes()
+        # Temporadas com resultados de só uma ou duas equipes no dataset (ex.: 2025) distorcem as fatias
+        completos = dominio.loc[dominio['equipes'] > 2, 'year']
+        pil = driver_team_share(ctx.pontos, team_seasons)
+        pil = pil[pil['year'].isin(completos)]
+        pil['nome_piloto'] = pil['driverId'].map(ctx.nomes)
         
-        stats5 = pd.merge(template_df, stats_real, on=['surname', 'grid'], how='left').fillna(0)
-        stats5['probabilidade'] = np.where(stats5['total_largadas'] > 0, 
-                                           (stats5['total_podios'] / stats5['total_largadas']) * 100, 0)
+        col_a, col_b = st.columns(2)
+        
+        with col_a:
+            show_chart(chapters.team_share_chart, pil, 'share_equipe', '% dos Pontos da Equipe')
+            
+        with col_b:
+            show_chart(chapters.team_share_chart, pil, 'share_carro', '% dos Pontos da Temporada (Equipe)')
         
-        fig5 = px.bar(stats5, x='grid', y='probabilidade', color='surname', barmode='group',
-                      color_discrete_map=CORES,
-                      text=stats5.apply(lambda x: f"{x['probabilidade']:.0f}%" if x['total_largadas']>0 else "", axis=1))
+        st.markdown("### Índice de Domínio do Carro")
+        st.markdown("Participação da equipe líder nos pontos de cada temporada. Quanto maior a barra (e a margem para a segunda), mais o título foi decidido na fábrica.")
         
-        fig5 = update_chart_layout(fig5)
-        fig5.update_layout(xaxis=dict(tickmode='linear', range=[0, 16]))
-        fig5.update_traces(textfont_color='#000000', textfont_weight='bold')
+        dom = dominio[dominio['year'].between(*ctx.anos) & dominio['year'].isin(completos)]
+        show_chart(chapters.dominance_chart, dom)
+        st.caption("Temporadas com resultados de apenas uma ou duas equipes no dataset (ex.: 2025, só com os dois pilotos) ficam fora deste capítulo.")
+
+    # --- CAPÍTULO 8: CONFRONTOS ---
+    with tab8:
+        st.subheader("Confrontos: Qualquer Duelo")
+        st.markdown(f"""
+        E se o duelo fosse outro? Escolha dois entre os **{matchups.TOP_N} pilotos com mais largadas** da história.
+        Os agregados de cada piloto e de cada par vêm pré-calculados (`python build_matchups.py`), então trocar de duelo é só uma busca.
+        """)
         
-        st.plotly_chart(fig5, use_container_width=True)
+        loja = load_confrontos()
+        ids = sorted(loja.nomes, key=loja.nomes.get)
+        # Padrão Lewis × Max; numa loja menor (--top) sem eles, completa com os primeiros da lista
+        padrao = [ids.index(p) for p in PILOTOS if p in ids]
+        padrao += [i for i in range(len(ids)) if i not in padrao][:2 - len(padrao)]
+        col_a, col_b = st.columns(2)
+        with col_a:
+            piloto_a = st.selectbox("Piloto A:", ids, index=padrao[0], format_func=loja.nomes.get)
+        with col_b:
+            piloto_b = st.selectbox("Piloto B:", ids, index=padrao[1], format_func=loja.nomes.get)
+        
+        if piloto_a == piloto_b:
+            st.warning("Escolha dois pilotos diferentes.")
+        else:
+            confronto = loja.matchup(piloto_a, piloto_b)
+            nome_a, nome_b = loja.nomes[piloto_a], loja.nomes[piloto_b]
+            cores_par = {nome_a: '#7C3AED', nome_b: '#2563EB'}
+            
+            # Período próprio: a maioria dos pares não correu no recorte global
+            anos_par = confronto['traj']['year']
+            ano_min, ano_max = int(anos_par.min()), int(anos_par.max())
+            periodo = st.slider("Temporadas do confronto:", ano_min, ano_max, (ano_min, ano_max))
+            confronto = {nome: df[df['year'].between(*periodo)] for nome, df in confronto.items()}
+            
+            h2h = confronto['h2h']
+            # Na loja o par é (menor driverId, maior driverId)
+            frente = {min(piloto_a, piloto_b): h2h['a_frente'].sum(), max(piloto_a, piloto_b): h2h['b_frente'].sum()}
+            col_1, col_2, col_3 = st.columns(3)
+            col_1.metric("Corridas lado a lado", f"{h2h['corridas'].sum()}")
+            col_2.metric(f"{nome_a} à frente", f"{frente[piloto_a]}")
+            col_3.metric(f"{nome_b} à frente", f"{frente[piloto_b]}")
+            
+            col_a, col_b = st.columns(2)
+            with col_a:
+                show_chart(chapters.matchup_trajectory_chart, confronto['traj'], loja.nomes, cores_par)
+            
+            with col_b:
+                show_chart(chapters.matchup_points_chart, confronto['pontos'], loja.nomes, cores_par)
+            
+            col_a, col_b = st.columns(2)
+            with col_a:
+                show_chart(chapters.matchup_position_change_chart, confronto['pos_hist'], loja.nomes, cores_par)
+            
+            with col_b:
+                show_chart(chapters.matchup_conversion_chart, confronto['grid'], loja.nomes, cores_par)
+            
+            st.caption(f"Loja de confrontos com dados até {loja.meta['ano_max']}. Temporadas ou etapas novas nos CSVs são incorporadas (atualização incremental) quando o app é reiniciado.")
 
     # --- CONCLUSÃO ---
-    with tab7:
+    with tab9:
         st.markdown('<h2 style="text-align: center; margin-bottom: 30px;">Veredito dos Dados</h2>', unsafe_allow_html=True)
         
         st.markdown("""
@@ -506,6 +614,49 @@ if results is not None:
         
         if st.button("🎉 Celebrar a Análise", use_container_width=True):
             st.balloons()
+
+    # --- EXPLORADOR SQL ---
+    with tab10:
+        st.subheader("Explorador SQL")
+        st.markdown(f"""
+        Perguntas que os capítulos não respondem? Consulte o dataset completo em SQL (somente `SELECT`).
+        Tabelas: `{'`, `'.join(explorer.TABELAS)}`. Até **{explorer.LIMITE_LINHAS}** linhas por resultado e **{explorer.TIMEOUT_S:g}s** por consulta.
+        """)
+        
+        if explorer.duckdb is None:
+            st.warning("Explorador indisponível: instale o pacote `duckdb`.")
+        else:
+            with st.expander("📋 Esquema das tabelas"):
+                st.dataframe(load_esquema(), use_container_width=True, hide_index=True)
+            
+            with st.form("explorador"):
+                sql = st.text_area("Consulta:", height=160, value="""-- Vitórias largando de P10 ou pior desde 2014
+SELECT d.forename || ' ' || d.surname AS piloto, COUNT(*) AS vitorias
+FROM results r
+JOIN races ra USING (raceId)
+JOIN drivers d USING (driverId)
+WHERE r.grid >= 10 AND r.positionOrder = 1 AND ra.year >= 2014
+GROUP BY piloto
+ORDER BY vitorias DESC""")
+                executar = st.form_submit_button("▶️ Executar", use_container_width=True)
+            
+            if executar and sql.strip():
+                try:
+                    resultado, truncado, ms = consultar(sql)
+                    st.dataframe(resultado, use_container_width=True, hide_index=True)
+                    st.caption(f"{len(resultado)} linhas em {ms:.1f} ms" + (" (resultado truncado)" if truncado else ""))
+                except Exception as e:
+                    st.error(f"Erro na consulta: {e}")
+    
+    # --- MONTAGEM DOS GRÁFICOS ---
+    # Todas as tarefas já foram submetidas: cada figura vai para o lugar reservado no seu capítulo
+    for vaga, fig in graficos:
+        if isinstance(fig, Future):
+            fig = fig.result()
+        with vaga:
+            st.plotly_chart(fig, use_container_width=True)
+            if mostrar_payload:
+                st.caption(f"📦 Payload: {payload_size(fig) / 1024:.1f} KB")
             
 else:
     st.warning("Aguardando carregamento dos dados...")
@@ -0,0 +1,47 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+import matchups
+
+# Pré-calcula a loja de confrontos (matchups.bin) usada pela aba "Confrontos".
+#
+# Uso: python build_matchups.py [--top 30] [--workers 4] [--full] [--saida matchups.bin]
+#
+# Sem --full, um arquivo existente é atualizado de forma incremental: só os
+# pilotos que correram nas temporadas novas ou com etapas novas (e os pares
+# que os envolvem) são recalculados. Use --full depois de corrigir dados de
+# temporadas antigas sem mudar a quantidade de linhas.
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Constrói a loja de confrontos pré-calculados")
+    parser.add_argument('--top', type=int, default=matchups.TOP_N, help="Pilotos com mais largadas incluídos")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processos em paralelo")
+    parser.add_argument('--full', action='store_true', help="Recalcula tudo, ignorando o arquivo existente")
+    parser.add_argument('--saida', default=matchups.ARQUIVO, help="Arquivo de saída")
+    args = parser.parse_args()
+
+    results = pd.read_csv('results.csv')
+    sprint_results = pd.read_csv('sprint_results.csv')
+    races = pd.read_csv('races.csv')
+    drivers = pd.read_csv('drivers.csv')
+
+    inicio = time.perf_counter()
+    n = matchups.build_store(args.saida, results, sprint_results, races, drivers,
+                             top_n=args.top, workers=args.workers, full=args.full)
+    duracao = time.perf_counter() - inicio
+
+    if n == 0:
+        print(f"{args.saida} já está atualizado.")
+        return
+    loja = matchups.MatchupStore(args.saida)
+    print(f"{n} pilotos recalculados em {duracao:.2f}s → {args.saida} "
+          f"({os.path.getsize(args.saida) / 1024:.0f} KB, {len(loja.nomes)} pilotos, "
+          f"{len(loja.nomes) * (len(loja.nomes) - 1) // 2} pares, até {loja.meta['ano_max']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""
+Preparação dos gráficos dos capítulos: dos agregados à figura pronta para envio.
+
+Cada gráfico é uma função pura de nível de módulo que recebe só DataFrames e
+valores simples e devolve a figura já estilizada e compactada. Assim cada uma
+pode ser submetida a um pool (de threads ou de processos — tudo aqui é
+serializável) enquanto o script monta a página; o app só posiciona as figuras
+quando todas ficam prontas. A montagem das figuras (plotly) é a parte mais cara
+de um rerun, por isso ela também vai para o pool, e não só os agregados.
+"""
+import plotly.express as px
+import plotly.graph_objects as go
+
+from rendering import histogram_binned, scatter_grid_finish
+from serialization import compact_figure
+from transitions import transition_matrix
+
+# Paleta de Cores Atualizada
+CORES = {'Lewis Hamilton': '#7C3AED', 'Max Verstappen': '#2563EB',
+         'Hamilton': '#7C3AED', 'Verstappen': '#2563EB'}
+
+
+def update_chart_layout(fig):
+    fig.update_layout(
+        template="plotly_white",
+        hovermode="x unified",
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Inter", color="#000000", size=14), # PRETO PURO
+        title_font_color="#000000",
+        legend_title_font_color="#000000",
+        legend_font_color="#000000",
+        legend=dict(orientation="h", y=1.02, yanchor="bottom", x=0.5, xanchor="center")
+    )
+    fig.update_xaxes(
+        showgrid=False,
+        color="#000000",
+        title_font_color="#000000",
+        tickfont_color="#000000"
+    )
+    fig.update_yaxes(
+        showgrid=True,
+        gridcolor='rgba(0,0,0,0.1)', # Grade sutil escura
+        color="#000000",
+        title_font_color="#000000",
+        tickfont_color="#000000"
+    )
+    return fig
+
+
+def _finish(fig):
+    # Layout padrão + compactação (ver serialization.py), ainda no worker
+    return compact_figure(update_chart_layout(fig))
+
+
+# ==========================================
+# CAPÍTULO 1: TRAJETÓRIAS
+# ==========================================
+def trajectory_chart(traj):
+    fig = px.line(traj, x='race_count', y='cum_wins', color='nome_piloto',
+                  color_discrete_map=CORES,
+                  labels={'race_count': 'Número de GPs na Carreira', 'cum_wins': 'Vitórias Acumuladas'})
+    return _finish(fig)
+
+
+def form_chart(forma, driver_ids, anos, nomes, metrica, rotulo):
+    forma = forma[forma['driverId'].isin(driver_ids) & forma['year'].between(*anos)]
+    forma = forma.assign(nome_piloto=forma['driverId'].map(nomes))
+    fig = px.line(forma, x='race_count', y=metrica, color='nome_piloto',
+                  color_discrete_map=CORES, hover_data=['year', 'round'],
+                  labels={'race_count': 'Número de GPs na Carreira', metrica: rotulo})
+    fig = update_chart_layout(fig)
+    if metrica == 'chegada_media':
+        fig.update_layout(yaxis=dict(autorange="reversed"))
+    return compact_figure(fig)
+
+
+# ==========================================
+# CAPÍTULO 2: ANATOMIA
+# ==========================================
+def position_change_chart(rows):
+    # Contagens calculadas no servidor: o navegador recebe só as caixas
+    fig = histogram_binned(rows[rows['grid'] > 0], x="pos_change", color="nome_piloto",
+                           nbins=30, opacity=0.7,
+                           color_map=CORES,
+                           labels={'pos_change': 'Posições Ganhas/Perdidas'})
+    fig.add_vline(x=0, line_dash="dash", line_color="#000000")
+    return _finish(fig)
+
+
+def top_recoveries_chart(top_rec):
+    fig = px.bar(top_rec, x='pos_change', y='Rotulo', color='nome_piloto',
+                 orientation='h', color_discrete_map=CORES,
+                 text='pos_change')
+    fig = update_chart_layout(fig)
+    fig.update_layout(showlegend=False, yaxis={'categoryorder': 'total ascending'})
+    fig.update_traces(textfont_color='#000000', textfont_weight='bold')
+    return compact_figure(fig)
+
+
+# ==========================================
+# CAPÍTULO 3: PONTOS
+# ==========================================
+def points_chart(pts):
+    fig = go.Figure()
+    for driver_id, nome in [(1, 'Lewis Hamilton'), (830, 'Max Verstappen')]:
+        piloto = pts[pts['driverId'] == driver_id]
+        fig.add_trace(go.Scatter(x=piloto['year'], y=piloto['total'], mode='lines+markers+text',
+                                 name=nome, line=dict(color=CORES[nome], width=3),
+                                 text=piloto['total'], textposition="top center",
+                                 textfont=dict(color='#000000', weight='bold')))
+    return _finish(fig)
+
+
+# ==========================================
+# CAPÍTULO 4: PROBABILIDADE
+# ==========================================
+def podium_chance_chart(grid, driver_id):
+    sel = grid[(grid['driverId'] == driver_id) & (grid['grid'] <= 20)]
+    sel = sel.rename(columns={'chance_podio': 'chance'})
+    fig = px.bar(sel, x='grid', y='chance',
+                 color_discrete_sequence=['#2563EB'],
+                 labels={'grid': 'Posição de Largada', 'chance': 'Chance de Pódio (%)'})
+    fig = update_chart_layout(fig)
+    fig.update_traces(texttemplate='%{y:.0f}%', textfont_color='#000000', textfont_weight='bold')
+    return compact_figure(fig)
+
+
+# ==========================================
+# CAPÍTULO 5: CONTEXTO
+# ==========================================
+def grid_finish_chart(rows):
+    # Gráfico de Dispersão: Grid vs Finish (agregado em WebGL quando há muitos pontos)
+    fig = scatter_grid_finish(rows, color="nome_piloto",
+                              color_map=CORES,
+                              hover_data=['name', 'year'],
+                              labels={'grid': 'Largada (Grid)', 'positionOrder': 'Chegada (Final)'})
+    fig.add_shape(type="line", x0=1, y0=1, x1=20, y1=20,
+                  line=dict(color="Gray", width=1, dash="dash"))
+    fig.update_layout(yaxis=dict(autorange="reversed")) # Inverter Y para 1º lugar ficar no topo
+    return _finish(fig)
+
+
+# ==========================================
+# CAPÍTULO 6: DUELO GRID
+# ==========================================
+def grid_duel_chart(duelo):
+    fig = px.bar(duelo, x='grid', y='probabilidade', color='surname', barmode='group',
+                 color_discrete_map=CORES)
+    fig = update_chart_layout(fig)
+    fig.update_layout(xaxis=dict(tickmode='linear', range=[0, 16]))
+    fig.update_traces(texttemplate='%{y:.0f}%', textfont_color='#000000', textfont_weight='bold')
+    return compact_figure(fig)
+
+
+def transition_heatmap(counts, driver_id, surname):
+    mat = transition_matrix(counts, driver_id)
+    mat = mat.loc[(mat.index > 0) & (mat.index <= 20), mat.columns <= 20]
+    fig = px.imshow(mat * 100, aspect='auto', origin='upper',
+                    color_continuous_scale=['#FFFFFF', CORES[surname]],
+                    labels={'x': 'Chegada', 'y': 'Largada', 'color': '%'},
+                    title=surname)
+    fig = update_chart_layout(fig)
+    fig.update_layout(hovermode='closest')
+    return compact_figure(fig)
+
+
+# ==========================================
+# CAPÍTULO 7: EQUIPES
+# ==========================================
+def team_share_chart(pil, y, rotulo):
+    fig = px.line(pil, x='year', y=y, color='nome_piloto', markers=True,
+                  color_discrete_map=CORES, hover_data=['equipe'],
+                  labels={'year': 'Temporada', y: rotulo})
+    return _finish(fig)
+
+
+def dominance_chart(dom):
+    fig = px.bar(dom, x='year', y='share_lider', color='equipe_lider',
+                 hover_data=['margem_lider', 'hhi'],
+                 labels={'year': 'Temporada', 'share_lider': '% dos Pontos (Equipe Líder)',
+                         'equipe_lider': 'Equipe', 'margem_lider': 'Margem p/ 2ª (p.p.)', 'hhi': 'HHI'})
+    return _finish(fig)
+
+
+# ==========================================
+# CAPÍTULO 8: CONFRONTOS
+# ==========================================
+def _nomear(df, nomes):
+    return df.assign(nome_piloto=df['driverId'].map(nomes))
+
+
+def matchup_trajectory_chart(traj, nomes, cores):
+    g = traj.groupby('driverId')
+    traj = _nomear(traj.assign(race_count=g.cumcount() + 1, cum_wins=g['win'].cumsum()), nomes)
+    fig = px.line(traj, x='race_count', y='cum_wins', color='nome_piloto',
+                  color_discrete_map=cores,
+                  labels={'race_count': 'Número de GPs no Período', 'cum_wins': 'Vitórias Acumuladas'})
+    return _finish(fig)
+
+
+def matchup_points_chart(pontos, nomes, cores):
+    fig = px.line(_nomear(pontos, nomes), x='year', y='pontos', color='nome_piloto', markers=True,
+                  color_discrete_map=cores,
+                  labels={'year': 'Temporada', 'pontos': 'Pontos (Corrida + Sprint)'})
+    return _finish(fig)
+
+
+def matchup_position_change_chart(pos_hist, nomes, cores):
+    hist = _nomear(pos_hist.groupby(['driverId', 'pos_change'], as_index=False)['n'].sum(), nomes)
+    fig = px.bar(hist, x='pos_change', y='n', color='nome_piloto', barmode='overlay', opacity=0.7,
+                 color_discrete_map=cores,
+                 labels={'pos_change': 'Posições Ganhas/Perdidas', 'n': 'Corridas'})
+    fig.add_vline(x=0, line_dash="dash", line_color="#000000")
+    return _finish(fig)
+
+
+def matchup_conversion_chart(grid, nomes, cores):
+    conv = grid[grid['grid'].between(1, 20)].groupby(['driverId', 'grid'], as_index=False)[['largadas', 'podios']].sum()
+    conv = _nomear(conv.assign(chance=conv['podios'] / conv['largadas'] * 100), nomes)
+    fig = px.bar(conv, x='grid', y='chance', color='nome_piloto', barmode='group',
+                 color_discrete_map=cores,
+                 labels={'grid': 'Posição de Largada', 'chance': 'Chance de Pódio (%)'})
+    return _finish(fig)
@@ -0,0 +1,127 @@
+import sys
+import time
+from dataclasses import fields
+
+import numpy as np
+import pandas as pd
+
+from engines import get_engine
+
+# Uso: python check_parity.py [escala]
+# Compara os agregados dos capítulos do motor pandas (referência) e do polars
+# no dataset real e em uma versão sintética com `escala` cópias dos pilotos.
+# Também confere que o recorte da tabela de transições pré-calculada (o que o
+# app usa) é igual à contagem direta das linhas filtradas, e as tabelas
+# pré-calculadas do app (transições, histogramas, forma, equipes).
+escala = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+# Load data
+results = pd.read_csv('results.csv')
+drivers = pd.read_csv('drivers.csv')
+races = pd.read_csv('races.csv')
+sprint_results = pd.read_csv('sprint_results.csv')
+constructors = pd.read_csv('constructors.csv')
+
+
+def scale(results, drivers, sprint_results, k):
+    # Cada cópia vira um novo conjunto de pilotos (driverId deslocado, sobrenome com sufixo)
+    off = drivers['driverId'].max() + 1
+    copias = range(k)
+    res = pd.concat([results.assign(driverId=results['driverId'] + i * off) for i in copias], ignore_index=True)
+    spr = pd.concat([sprint_results.assign(driverId=sprint_results['driverId'] + i * off) for i in copias], ignore_index=True)
+    drv = pd.concat([drivers.assign(driverId=drivers['driverId'] + i * off,
+                                    surname=drivers['surname'] + ('' if i == 0 else f' #{i}')) for i in copias],
+                    ignore_index=True)
+    return res, drv, spr, off
+
+
+def compare_value(nome, a, b):
+    try:
+        if isinstance(a, pd.DataFrame):
+            pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True)[a.columns],
+                                          check_dtype=False)
+        elif isinstance(a, pd.Index):
+            pd.testing.assert_index_equal(a, b)
+        elif isinstance(a, np.ndarray):
+            np.testing.assert_array_equal(a, b)
+        elif a != b:
+            return [f"{nome}: {a!r} != {b!r}"]
+    except (AssertionError, KeyError) as e:
+        return [f"{nome}: {str(e).strip().splitlines()[0]}"]
+    return []
+
+
+def compare(ref, alt):
+    erros = []
+    for campo in fields(ref):
+        erros += compare_value(campo.name, getattr(ref, campo.name), getattr(alt, campo.name))
+    return erros
+
+
+def compare_tables(motores, results, sprint_results):
+    # Tabelas independentes dos filtros, calculadas uma vez por processo do app
+    tabelas = {
+        'transicoes': lambda e: e.transitions(results, races),
+        'forma': lambda e: e.form(results, races, 10),
+        'equipes': lambda e: e.team_seasons(results, sprint_results, races, constructors),
+    }
+    erros = []
+    for nome, fn in tabelas.items():
+        erros += compare_value(nome, fn(motores['pandas']), fn(motores['polars']))
+    erros += compare(motores['pandas'].histograms(results, sprint_results, races),
+                     motores['polars'].histograms(results, sprint_results, races))
+    return erros
+
+
+def run(nome, results, drivers, sprint_results, cenarios):
+    print(f"\n== {nome}: {len(results)} resultados ==")
+    falhas = 0
+    motores = {m: get_engine(m) for m in ('pandas', 'polars')}
+    tempos = {m: 0.0 for m in motores}
+    bases = {}
+    for m, engine in motores.items():
+        t = time.perf_counter()
+        bases[m] = engine.prepare(results, drivers, races, sprint_results)
+        tempos[m] += time.perf_counter() - t
+    transicoes = motores['pandas'].transitions(results, races)
+
+    erros = compare_tables(motores, results, sprint_results)
+    falhas += bool(erros)
+    print(f"{'OK  ' if not erros else 'FAIL'} tabelas pré-calculadas")
+    for erro in erros:
+        print(f"     {erro}")
+
+    for anos, ids in cenarios:
+        ctxs = {}
+        for m, engine in motores.items():
+            t = time.perf_counter()
+            ctxs[m] = engine.context(*bases[m], anos, ids)
+            tempos[m] += time.perf_counter() - t
+        erros = compare(ctxs['pandas'], ctxs['polars'])
+        for m, engine in motores.items():
+            tabela = engine.context(*bases[m], anos, ids, transicoes=transicoes)
+            erros += [f"[{m} + tabela] {e}" for e in compare(ctxs['pandas'], tabela)]
+        falhas += bool(erros)
+        print(f"{'OK  ' if not erros else 'FAIL'} anos={anos} pilotos={len(ids)}")
+        for erro in erros:
+            print(f"     {erro}")
+
+    print("Tempo total: " + ", ".join(f"{m}={t:.3f}s" for m, t in tempos.items()))
+    return falhas
+
+
+todos = tuple(drivers['driverId'])
+falhas = run('Dataset real', results, drivers, sprint_results, [
+    ((2015, 2025), (1, 830)),
+    ((2014, 2014), (1, 830)),
+    ((1950, 2025), todos),
+])
+
+res_s, drv_s, spr_s, off = scale(results, drivers, sprint_results, escala)
+falhas += run(f'Sintético x{escala}', res_s, drv_s, spr_s, [
+    ((2015, 2025), tuple(i + k * off for k in range(escala) for i in (1, 830))),
+    ((1950, 2025), tuple(drv_s['driverId'])),
+])
+
+print(f"\n{'Paridade OK' if not falhas else f'{falhas} cenário(s) divergente(s)'}")
+sys.exit(1 if falhas else 0)
@@ -0,0 +1,70 @@
+"""
+Contexto de equipe: agregados por (temporada, construtor).
+
+Tudo sai de um único groupby sobre corridas + sprints. Os agregados dos
+pilotos são ligados a ele pela chave (year, constructorId), sem laços por
+temporada. Como as participações são calculadas dentro de cada temporada,
+as diferenças de sistema de pontuação entre eras não afetam a comparação.
+"""
+import pandas as pd
+
+
+def _season_rows(results, sprint_results, races):
+    # Corridas e sprints em uma única tabela (year, constructorId, driverId, pontos, vitória)
+    cols = ['raceId', 'driverId', 'constructorId', 'points', 'positionOrder']
+    corridas = results[cols].assign(vitoria=lambda x: (x['positionOrder'] == 1).astype(int))
+    sprints = sprint_results[cols].assign(vitoria=0)
+    linhas = pd.concat([corridas, sprints], ignore_index=True)
+    return linhas.merge(races[['raceId', 'year']], on='raceId', how='left')
+
+
+def build_team_seasons(results, sprint_results, races, constructors):
+    """
+    Uma linha por (year, constructorId) com pontos, vitórias, participação
+    nos pontos da temporada (`share_pontos`) e nas vitórias (`share_vitorias`).
+    """
+    linhas = _season_rows(results, sprint_results, races)
+    equipes = linhas.groupby(['year', 'constructorId']).agg(
+        pontos=('points', 'sum'),
+        vitorias=('vitoria', 'sum'),
+    ).reset_index()
+
+    por_ano = equipes.groupby('year')
+    equipes['share_pontos'] = (equipes['pontos'] / por_ano['pontos'].transform('sum')).fillna(0) * 100
+    equipes['share_vitorias'] = (equipes['vitorias'] / por_ano['vitorias'].transform('sum')).fillna(0) * 100
+    equipes = equipes.merge(constructors[['constructorId', 'name']].rename(columns={'name': 'equipe'}),
+                            on='constructorId', how='left')
+    return equipes
+
+
+def dominance_index(team_seasons):
+    """
+    Índices de domínio de carro por temporada: participação da equipe líder,
+    margem para a segunda e Herfindahl (HHI, 0-10000) das participações.
+    `equipes` conta os times com resultados — temporadas parciais têm poucos.
+    """
+    t = team_seasons.sort_values(['year', 'share_pontos'], ascending=[True, False])
+    t = t.assign(rank=t.groupby('year').cumcount() + 1, hhi=t['share_pontos'] ** 2)
+    lider = t[t['rank'] == 1].set_index('year')
+    segunda = t[t['rank'] == 2].set_index('year')['share_pontos']
+
+    indices = pd.DataFrame({
+        'equipe_lider': lider['equipe'],
+        'share_lider': lider['share_pontos'],
+        'margem_lider': lider['share_pontos'] - segunda.reindex(lider.index).fillna(0),
+        'hhi': t.groupby('year')['hhi'].sum(),
+        'equipes': t.groupby('year')['constructorId'].nunique(),
+    })
+    return indices.reset_index()
+
+
+def driver_team_share(pontos_piloto, team_seasons):
+    """
+    Liga os pontos de cada piloto por (year, constructorId) à equipe pela chave:
+    `share_equipe` é a fatia do piloto nos pontos do próprio time e
+    `share_carro` a fatia do time nos pontos da temporada.
+    """
+    equipe = team_seasons[['year', 'constructorId', 'equipe', 'pontos', 'share_pontos']]
+    pilotos = pontos_piloto.merge(equipe, on=['year', 'constructorId'], how='left')
+    pilotos['share_equipe'] = (pilotos['pontos_piloto'] / pilotos['pontos']).fillna(0) * 100
+    return pilotos.rename(columns={'share_pontos': 'share_carro', 'pontos': 'pontos_equipe'})
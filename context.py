@@ -0,0 +1,162 @@
+"""
+Contexto de análise: o recorte (período, pilotos) calculado uma vez por rerun.
+
+`prepare_base` junta nomes e dados das corridas a todos os resultados e deriva
+as colunas comuns — isso não depende dos filtros e é feito uma única vez.
+`build_context` aplica o filtro global em uma única passada e calcula os
+agregados que os capítulos consomem, para que nenhum deles volte às linhas
+cruas nem refaça merges por conta própria. Os agregados são independentes
+entre si: com um `executor` (ThreadPoolExecutor ou ProcessPoolExecutor)
+cada capítulo é submetido ao pool e o contexto é montado quando todos
+terminam (`run_tasks`, usado também pelo app para as demais preparações).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from transitions import count_transitions, grid_stats, resilience_scores, select_counts
+
+
+@dataclass
+class AnalysisContext:
+    anos: tuple
+    driver_ids: tuple
+    nomes: dict          # driverId → nome completo
+    sobrenomes: dict     # driverId → sobrenome
+    rows: pd.DataFrame   # resultados filtrados com colunas derivadas
+    sprints: pd.DataFrame
+    traj: pd.DataFrame
+    top_rec: pd.DataFrame
+    pontos: pd.DataFrame
+    counts: pd.DataFrame
+    grid: pd.DataFrame
+    resumo: pd.DataFrame
+    stats_mid: pd.DataFrame
+    duelo: pd.DataFrame
+
+
+def prepare_base(results, drivers, races, sprint_results):
+    """Resultados e sprints de todos os pilotos com nomes, temporada e colunas derivadas."""
+    base = results.merge(drivers[['driverId', 'forename', 'surname']], on='driverId', how='left')
+    base = base.merge(races[['raceId', 'year', 'date', 'round', 'name']], on='raceId', how='left')
+    base['nome_piloto'] = base['forename'] + ' ' + base['surname']
+    base['pos_change'] = np.where(base['grid'] > 0, base['grid'] - base['positionOrder'], 0)
+    base['win'] = (base['positionOrder'] == 1).astype(int)
+    base['is_podium'] = (base['positionOrder'] <= 3).astype(int)
+
+    sprints = sprint_results.merge(races[['raceId', 'year']], on='raceId', how='left')
+    return base, sprints
+
+
+def run_tasks(tarefas, executor=None):
+    """Executa {nome: (fn, *args)} em ordem ou, com `executor`, todas de uma vez no pool."""
+    if executor is None:
+        return {nome: fn(*args) for nome, (fn, *args) in tarefas.items()}
+    futuros = {nome: executor.submit(fn, *args) for nome, (fn, *args) in tarefas.items()}
+    return {nome: futuro.result() for nome, futuro in futuros.items()}
+
+
+# ==========================================
+# AGREGADOS POR CAPÍTULO
+# ==========================================
+def trajectory(rows):
+    """Vitórias acumuladas por número de GPs no período."""
+    traj = rows.sort_values(['driverId', 'year', 'round'])
+    traj = traj.assign(cum_wins=traj.groupby('driverId')['win'].cumsum(),
+                       race_count=traj.groupby('driverId').cumcount() + 1)
+    return traj[['driverId', 'nome_piloto', 'year', 'round', 'race_count', 'cum_wins']]
+
+
+def top_recoveries(rows, n=5):
+    """As `n` maiores recuperações de posição de cada piloto."""
+    # Ordenação estável: empates ficam na ordem das linhas, igual em qualquer motor
+    top = rows.sort_values('pos_change', ascending=False, kind='stable').groupby('nome_piloto').head(n)
+    return top.assign(Rotulo=top['name'] + ' ' + top['year'].astype(str))
+
+
+def season_points(rows, sprints):
+    """Pontos de corrida + sprint por (piloto, temporada, equipe)."""
+    keys = ['driverId', 'year', 'constructorId']
+    pontos = rows.groupby(keys)['points'].sum().rename('pontos_corrida').to_frame()
+    sprint = sprints.groupby(keys)['points'].sum().rename('pontos_sprint')
+    pontos = pontos.join(sprint, how='left').fillna(0).reset_index()
+    pontos['pontos_piloto'] = pontos['pontos_corrida'] + pontos['pontos_sprint']
+    return pontos
+
+
+def midfield_stats(rows, min_grid=4):
+    """Corridas, vitórias e pódios largando de `min_grid` para trás."""
+    mid = rows[rows['grid'] >= min_grid].groupby('nome_piloto').agg(
+        corridas=('raceId', 'count'),
+        vitorias=('win', 'sum'),
+        podios=('is_podium', 'sum'),
+    ).reset_index()
+    mid['win_rate'] = (mid['vitorias'] / mid['corridas']) * 100
+    mid['podium_rate'] = (mid['podios'] / mid['corridas']) * 100
+    return mid
+
+
+def grid_duel(grid, sobrenomes, max_grid=20):
+    """Chance de pódio por largada (1..max_grid) de cada piloto, com todas as combinações."""
+    grids_all = pd.DataFrame({'grid': range(1, max_grid + 1)})
+    pilotos_all = pd.DataFrame({'surname': list(sobrenomes.values())})
+    template_df = pd.merge(pilotos_all.assign(key=1), grids_all.assign(key=1), on='key').drop('key', axis=1)
+
+    stats_real = grid.assign(surname=grid['driverId'].map(sobrenomes))
+    stats_real = stats_real.rename(columns={'largadas': 'total_largadas', 'podios': 'total_podios'})
+    stats_real = stats_real[['surname', 'grid', 'total_largadas', 'total_podios']]
+
+    duelo = pd.merge(template_df, stats_real, on=['surname', 'grid'], how='left').fillna(0)
+    # Sem largadas no grid → NaN: nem barra nem rótulo
+    duelo['probabilidade'] = np.where(duelo['total_largadas'] > 0,
+                                      (duelo['total_podios'] / duelo['total_largadas']) * 100, np.nan)
+    return duelo
+
+
+def transition_chapter(rows, sobrenomes, transicoes=None, anos=None):
+    """
+    Contagens de transição e tudo que deriva delas (capítulos 4 e 6). Com
+    `transicoes` (tabela por temporada de todos os pilotos, calculada uma vez
+    por `transitions.build_transition_counts`) o recorte é só um filtro por chave.
+    """
+    if transicoes is None:
+        counts = count_transitions(rows)
+    else:
+        counts = select_counts(transicoes, list(sobrenomes), anos)
+    grid = grid_stats(counts)
+    return counts, grid, resilience_scores(counts), grid_duel(grid, sobrenomes)
+
+
+def build_context(base, sprints, anos, driver_ids, executor=None, transicoes=None):
+    """Filtra (período, pilotos) uma única vez e calcula os agregados dos capítulos."""
+    driver_ids = tuple(driver_ids)
+    pilotos = base[base['driverId'].isin(driver_ids)]
+    nomes = pilotos.drop_duplicates('driverId').set_index('driverId')
+    sobrenomes = nomes['surname'].to_dict()
+    rows = pilotos[pilotos['year'].between(anos[0], anos[1])]
+    spr = sprints[sprints['driverId'].isin(driver_ids) & sprints['year'].between(anos[0], anos[1])]
+
+    tarefas = {
+        'traj': (trajectory, rows),
+        'top_rec': (top_recoveries, rows),
+        'pontos': (season_points, rows, spr),
+        'transicoes': (transition_chapter, rows, sobrenomes, transicoes, anos),
+        'stats_mid': (midfield_stats, rows),
+    }
+    prontos = run_tasks(tarefas, executor)
+    counts, grid, resumo, duelo = prontos.pop('transicoes')
+
+    return AnalysisContext(
+        anos=tuple(anos),
+        driver_ids=driver_ids,
+        nomes=nomes['nome_piloto'].to_dict(),
+        sobrenomes=sobrenomes,
+        rows=rows,
+        sprints=spr,
+        counts=counts,
+        grid=grid,
+        resumo=resumo,
+        duelo=duelo,
+        **prontos,
+    )
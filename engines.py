@@ -0,0 +1,284 @@
+"""
+Motores de dataframe para a camada de preparação de dados.
+
+Todo motor expõe a mesma interface:
+
+* `prepare(results, drivers, races, sprint_results)` → (base, sprints)
+* `context(base, sprints, anos, driver_ids, executor=None, transicoes=None)` → AnalysisContext
+* `transitions(results, races)` → contagens por temporada (`transitions.build_transition_counts`)
+* `histograms(results, sprint_results, races)` → PositionHistograms (`scoring.build_histograms`)
+* `form(results, races, n)` → janelas móveis (`form.build_form`)
+* `team_seasons(results, sprint_results, races, constructors)` → (`constructors.build_team_seasons`)
+
+`transicoes` é a tabela de transições por temporada de todos os pilotos,
+calculada uma vez e cacheada pelo app; com ela os dois motores só filtram o
+recorte por chave.
+
+O `PandasEngine` é a referência (context.py). O `PolarsEngine` monta o mesmo
+recorte como consultas lazy do polars, executadas juntas com `collect_all`
+(multithread, com subplanos comuns calculados uma vez), e devolve os
+agregados como DataFrames pandas — os capítulos não percebem a diferença.
+Agregados derivados de tabelas já agregadas (grid, resiliência, duelo) são
+pequenos e usam as mesmas funções nos dois motores.
+
+A paridade entre os motores é verificada por `check_parity.py`.
+
+Fora dos motores (sempre pandas/numpy): os recortes derivados das tabelas
+acima (re-pontuação, classificação, domínio), a loja de confrontos, que é
+construída offline por `build_matchups.py`, e o explorador SQL (DuckDB).
+"""
+import numpy as np
+import pandas as pd
+
+import form
+import scoring
+from constructors import build_team_seasons
+from context import AnalysisContext, build_context, grid_duel, prepare_base
+from transitions import (ERAS_BINS, ERAS_LABELS, build_transition_counts, grid_stats,
+                         resilience_scores, select_counts)
+
+try:
+    import polars as pl
+except ImportError:  # O motor polars é opcional
+    pl = None
+
+
+class PandasEngine:
+    nome = 'pandas'
+
+    def prepare(self, results, drivers, races, sprint_results):
+        return prepare_base(results, drivers, races, sprint_results)
+
+    def context(self, base, sprints, anos, driver_ids, executor=None, transicoes=None):
+        return build_context(base, sprints, anos, driver_ids, executor=executor, transicoes=transicoes)
+
+    def transitions(self, results, races):
+        return build_transition_counts(results, races)
+
+    def histograms(self, results, sprint_results, races):
+        return scoring.build_histograms(results, sprint_results, races)
+
+    def form(self, results, races, n):
+        return form.build_form(results, races, n)
+
+    def team_seasons(self, results, sprint_results, races, constructors):
+        return build_team_seasons(results, sprint_results, races, constructors)
+
+
+class PolarsEngine:
+    nome = 'polars'
+
+    def __init__(self):
+        if pl is None:
+            raise ImportError("O motor 'polars' requer o pacote polars instalado.")
+
+    def prepare(self, results, drivers, races, sprint_results):
+        corridas = pl.from_pandas(races[['raceId', 'year', 'date', 'round', 'name']]).lazy()
+        base = (
+            pl.from_pandas(results).lazy()
+            .with_row_index('_ordem')
+            .join(pl.from_pandas(drivers[['driverId', 'forename', 'surname']]).lazy(), on='driverId', how='left')
+            .join(corridas, on='raceId', how='left')
+            .sort('_ordem')
+            .drop('_ordem')
+            .with_columns(
+                nome_piloto=pl.col('forename') + ' ' + pl.col('surname'),
+                pos_change=pl.when(pl.col('grid') > 0)
+                             .then(pl.col('grid') - pl.col('positionOrder')).otherwise(0),
+                win=(pl.col('positionOrder') == 1).cast(pl.Int64),
+                is_podium=(pl.col('positionOrder') <= 3).cast(pl.Int64),
+            )
+        )
+        sprints = (
+            pl.from_pandas(sprint_results).lazy()
+            .with_row_index('_ordem')
+            .join(corridas.select('raceId', 'year'), on='raceId', how='left')
+            .sort('_ordem')
+            .drop('_ordem')
+        )
+        return pl.collect_all([base, sprints])
+
+    def context(self, base, sprints, anos, driver_ids, executor=None, transicoes=None):
+        # `executor` é ignorado: o polars já paraleliza as consultas internamente
+        driver_ids = tuple(driver_ids)
+        pilotos = base.lazy().filter(pl.col('driverId').is_in(driver_ids))
+        rows = pilotos.filter(pl.col('year').is_between(anos[0], anos[1]))
+        spr = sprints.lazy().filter(pl.col('driverId').is_in(driver_ids)
+                                    & pl.col('year').is_between(anos[0], anos[1]))
+
+        consultas = {
+            'nomes': pilotos.unique('driverId', keep='first', maintain_order=True)
+                            .select('driverId', 'nome_piloto', 'surname'),
+            'rows': rows,
+            'sprints': spr,
+            'traj': self._trajectory(rows),
+            'top_rec': self._top_recoveries(rows),
+            'pontos': self._season_points(rows, spr),
+            'stats_mid': self._midfield_stats(rows),
+        }
+        if transicoes is None:
+            consultas['counts'] = self._count_transitions(rows)
+        prontos = dict(zip(consultas, (df.to_pandas() for df in pl.collect_all(list(consultas.values())))))
+
+        nomes = prontos.pop('nomes').set_index('driverId')
+        sobrenomes = nomes['surname'].to_dict()
+        if transicoes is None:
+            counts = prontos.pop('counts')
+            counts['era'] = pd.Categorical.from_codes(counts.pop('era_idx'), ERAS_LABELS, ordered=True)
+            counts = counts[['driverId', 'era', 'grid', 'positionOrder', 'n']]
+        else:
+            counts = select_counts(transicoes, list(sobrenomes), anos)
+        grid = grid_stats(counts)
+
+        return AnalysisContext(
+            anos=tuple(anos),
+            driver_ids=driver_ids,
+            nomes=nomes['nome_piloto'].to_dict(),
+            sobrenomes=sobrenomes,
+            counts=counts,
+            grid=grid,
+            resumo=resilience_scores(counts),
+            duelo=grid_duel(grid, sobrenomes),
+            **prontos,
+        )
+
+    # --- Tabelas independentes dos filtros (mesma semântica dos módulos pandas) ---
+    def transitions(self, results, races):
+        return (self._with_year(results[['raceId', 'driverId', 'grid', 'positionOrder']], races)
+                    .group_by(['driverId', 'year', 'grid', 'positionOrder'])
+                    .agg(n=pl.len().cast(pl.Int64))
+                    .sort(['driverId', 'year', 'grid', 'positionOrder'])
+                    .collect().to_pandas())
+
+    def histograms(self, results, sprint_results, races):
+        def classificadas(df, cols):
+            # `position` numérico (o CSV traz \N para não classificados)
+            return (self._with_year(df[cols], races)
+                        .with_columns(pos=pl.col('position').cast(pl.Int64, strict=False)))
+
+        corridas = classificadas(results, ['raceId', 'driverId', 'position', 'points', 'rank'])
+        sprints = classificadas(sprint_results, ['raceId', 'driverId', 'position', 'points'])
+        chaves = (pl.concat([corridas.select('driverId', 'year'), sprints.select('driverId', 'year')])
+                    .unique().sort(['driverId', 'year']).with_row_index('linha'))
+
+        def contagens(rows):
+            return (rows.filter(pl.col('pos').is_between(1, scoring.MAX_POS))
+                        .group_by(['driverId', 'year', 'pos']).agg(n=pl.len())
+                        .join(chaves, on=['driverId', 'year']).select('linha', 'pos', 'n'))
+
+        vr = (corridas.with_columns(vr=(pl.col('rank').cast(pl.Int64, strict=False) == 1).fill_null(False).cast(pl.Int64))
+                      .with_columns(vr_top10=pl.col('vr') * (pl.col('pos') <= 10).fill_null(False).cast(pl.Int64))
+                      .group_by(['driverId', 'year']).agg(pl.col('vr').sum(), pl.col('vr_top10').sum()))
+        originais = (pl.concat([corridas.select('driverId', 'year', 'points'), sprints.select('driverId', 'year', 'points')],
+                           how='vertical_relaxed')
+                       .group_by(['driverId', 'year']).agg(pl.col('points').sum()))
+        totais = (chaves.join(vr, on=['driverId', 'year'], how='left')
+                        .join(originais, on=['driverId', 'year'], how='left')
+                        .sort('linha').fill_null(0))
+
+        chaves, corrida, sprint, totais = pl.collect_all([chaves, contagens(corridas), contagens(sprints), totais])
+
+        def matriz(cont):
+            hist = np.zeros((chaves.height, scoring.MAX_POS + 1), dtype=np.int32)
+            hist[cont['linha'].to_numpy(), cont['pos'].to_numpy()] = cont['n'].to_numpy()
+            return hist
+
+        return scoring.PositionHistograms(
+            index=pd.MultiIndex.from_frame(chaves.select('driverId', 'year').to_pandas()),
+            corrida=matriz(corrida),
+            sprint=matriz(sprint),
+            vr=totais['vr'].to_numpy(),
+            vr_top10=totais['vr_top10'].to_numpy(),
+            originais=totais['points'].to_numpy(),
+        )
+
+    def form(self, results, races, n):
+        rows = (self._with_year(results[['raceId', 'driverId', 'positionOrder', 'points']], races, ['round'])
+                    .with_columns(win=(pl.col('positionOrder') == 1).cast(pl.Int64),
+                                  is_podium=(pl.col('positionOrder') <= 3).cast(pl.Int64))
+                    .sort(form.ORDEM, maintain_order=True)
+                    .select(form.CHAVES + form.ORIGENS)
+                    .with_columns(race_count=pl.int_range(1, pl.len() + 1).over('driverId')))
+        janela = pl.min_horizontal(pl.col('race_count'), pl.lit(n))
+        metricas = []
+        for nome, (col, escala) in form.METRICAS.items():
+            acum = pl.col(col).cum_sum().over('driverId')
+            soma = acum - acum.shift(n, fill_value=0).over('driverId')
+            metricas.append((soma / janela * escala).alias(nome))
+        return rows.with_columns(metricas).collect().to_pandas()
+
+    def team_seasons(self, results, sprint_results, races, constructors):
+        cols = ['raceId', 'driverId', 'constructorId', 'points', 'positionOrder']
+        linhas = pl.concat([
+            pl.from_pandas(results[cols]).with_columns(vitoria=(pl.col('positionOrder') == 1).cast(pl.Int64)),
+            pl.from_pandas(sprint_results[cols]).with_columns(vitoria=pl.lit(0, dtype=pl.Int64)),
+        ], how='vertical_relaxed').lazy()
+        linhas = linhas.join(pl.from_pandas(races[['raceId', 'year']]).lazy(), on='raceId', how='left')
+        parte = lambda col: (pl.col(col) / pl.col(col).sum().over('year')).fill_nan(0) * 100
+        return (linhas.group_by(['year', 'constructorId'])
+                      .agg(pontos=pl.col('points').sum(), vitorias=pl.col('vitoria').sum())
+                      .sort(['year', 'constructorId'])
+                      .with_columns(share_pontos=parte('pontos'), share_vitorias=parte('vitorias'))
+                      .join(pl.from_pandas(constructors[['constructorId', 'name']]).lazy().rename({'name': 'equipe'}),
+                            on='constructorId', how='left', maintain_order='left')
+                      .collect().to_pandas())
+
+    @staticmethod
+    def _with_year(df, races, extras=()):
+        corridas = pl.from_pandas(races[['raceId', 'year', *extras]]).lazy()
+        return pl.from_pandas(df).lazy().join(corridas, on='raceId', how='left', maintain_order='left')
+
+    # --- Agregados por capítulo (mesma semântica das funções de context.py) ---
+    @staticmethod
+    def _trajectory(rows):
+        return (rows.sort(['driverId', 'year', 'round'], maintain_order=True)
+                    .with_columns(race_count=pl.int_range(1, pl.len() + 1).over('driverId'),
+                                  cum_wins=pl.col('win').cum_sum().over('driverId'))
+                    .select('driverId', 'nome_piloto', 'year', 'round', 'race_count', 'cum_wins'))
+
+    @staticmethod
+    def _top_recoveries(rows, n=5):
+        return (rows.sort('pos_change', descending=True, maintain_order=True)
+                    .filter(pl.int_range(pl.len()).over('nome_piloto') < n)
+                    .with_columns(Rotulo=pl.col('name') + ' ' + pl.col('year').cast(pl.String)))
+
+    @staticmethod
+    def _season_points(rows, sprints):
+        keys = ['driverId', 'year', 'constructorId']
+        sprint = sprints.group_by(keys).agg(pontos_sprint=pl.col('points').sum())
+        return (rows.group_by(keys).agg(pontos_corrida=pl.col('points').sum())
+                    .join(sprint, on=keys, how='left')
+                    .with_columns(pl.col('pontos_sprint').fill_null(0).cast(pl.Float64))
+                    .with_columns(pontos_piloto=pl.col('pontos_corrida') + pl.col('pontos_sprint'))
+                    .sort(keys))
+
+    @staticmethod
+    def _count_transitions(rows):
+        # Índice da era: quantos limites internos o ano ultrapassa (mesmos bins do pd.cut)
+        era_idx = sum((pl.col('year') > limite).cast(pl.Int8) for limite in ERAS_BINS[1:-1])
+        return (rows.with_columns(era_idx=era_idx)
+                    .group_by(['driverId', 'era_idx', 'grid', 'positionOrder'])
+                    .agg(n=pl.len().cast(pl.Int64))
+                    .sort(['driverId', 'era_idx', 'grid', 'positionOrder']))
+
+    @staticmethod
+    def _midfield_stats(rows, min_grid=4):
+        return (rows.filter(pl.col('grid') >= min_grid)
+                    .group_by('nome_piloto')
+                    .agg(corridas=pl.len().cast(pl.Int64),
+                         vitorias=pl.col('win').sum(),
+                         podios=pl.col('is_podium').sum())
+                    .sort('nome_piloto')
+                    .with_columns(win_rate=pl.col('vitorias') / pl.col('corridas') * 100,
+                                  podium_rate=pl.col('podios') / pl.col('corridas') * 100))
+
+
+ENGINES = {'pandas': PandasEngine, 'polars': PolarsEngine}
+
+
+def get_engine(nome='pandas'):
+    """Instancia o motor pelo nome (ver ENGINES)."""
+    try:
+        return ENGINES[nome]()
+    except KeyError:
+        raise ValueError(f"Motor desconhecido: {nome!r}. Opções: {', '.join(ENGINES)}")
@@ -0,0 +1,76 @@
+"""
+Explorador SQL somente-leitura sobre o dataset.
+
+Os CSVs são carregados uma vez em um snapshot tipado (`\\N` vira nulo) e
+copiados para um banco DuckDB em memória — um motor colunar embutido no
+próprio processo. Cada consulta roda em um cursor próprio, com limite de
+linhas, timeout e acesso a arquivos desabilitado.
+"""
+import threading
+
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # Sem o duckdb o explorador fica desabilitado
+    duckdb = None
+
+TABELAS = ('results', 'races', 'drivers', 'constructors', 'qualifying', 'sprint_results')
+LIMITE_LINHAS = 1000
+TIMEOUT_S = 5.0
+
+
+def load_snapshot(tabelas=TABELAS):
+    """Lê os CSVs com tipos corretos: `\\N` é tratado como nulo."""
+    snapshot = {}
+    for nome in tabelas:
+        try:
+            snapshot[nome] = pd.read_csv(f'{nome}.csv', na_values=['\\N'])
+        except FileNotFoundError:
+            continue
+    return snapshot
+
+
+def build_engine(snapshot):
+    """Cria o banco em memória com uma tabela por CSV e trava a configuração."""
+    con = duckdb.connect(':memory:')
+    for nome, df in snapshot.items():
+        con.register('_snapshot', df)
+        con.execute(f'CREATE TABLE {nome} AS SELECT * FROM _snapshot')
+        con.unregister('_snapshot')
+    con.execute('SET enable_external_access = false')
+    con.execute('SET lock_configuration = true')
+    return con
+
+
+def schema(con):
+    """Colunas e tipos de cada tabela, para referência no explorador."""
+    # Cursor próprio: a conexão é compartilhada entre sessões e não é thread-safe
+    with con.cursor() as cursor:
+        return cursor.sql("SELECT table_name AS tabela, column_name AS coluna, data_type AS tipo "
+                          "FROM information_schema.columns ORDER BY table_name, ordinal_position").df()
+
+
+def run_query(con, sql, limite=LIMITE_LINHAS, timeout=TIMEOUT_S):
+    """
+    Executa uma única consulta SELECT. Devolve (resultado, truncado).
+    Levanta ValueError para consultas que não são leitura e TimeoutError
+    quando o tempo limite é atingido.
+    """
+    instrucoes = con.extract_statements(sql)
+    if len(instrucoes) != 1 or instrucoes[0].type != duckdb.StatementType.SELECT:
+        raise ValueError("Apenas uma consulta SELECT por vez é permitida.")
+
+    cursor = con.cursor()
+    timer = threading.Timer(timeout, cursor.interrupt)
+    timer.start()
+    try:
+        # O LIMIT é aplicado pelo motor; a linha extra indica que houve corte
+        resultado = cursor.sql(instrucoes[0].query.rstrip().rstrip(';')).limit(limite + 1).df()
+    except duckdb.InterruptException:
+        raise TimeoutError(f"Consulta interrompida após {timeout:g}s.")
+    finally:
+        timer.cancel()
+        cursor.close()
+
+    return resultado.head(limite), len(resultado) > limite
@@ -0,0 +1,69 @@
+"""
+Forma recente: métricas em janela móvel das últimas N corridas de cada piloto.
+
+As janelas saem de somas acumuladas por piloto: soma da janela = acumulado
+agora − acumulado N corridas atrás (`groupby().cumsum()` + `shift(N)`), tudo
+vetorizado. Como cada janela só depende das N corridas anteriores,
+`extend_form` acrescenta corridas novas olhando apenas a cauda de N linhas
+de cada piloto, sem recalcular a carreira inteira.
+
+O app ainda não usa `extend_form`: os CSVs são lidos uma vez por processo e
+`load_forma` monta a tabela com `build_form`. Ela fica como gancho para um
+caminho de ingestão de corridas novas (ex.: após `update_data_2025.py`), com
+a mesma semântica de `build_form` — as corridas novas vêm depois das que já
+estão na tabela.
+"""
+import numpy as np
+import pandas as pd
+
+ORDEM = ['driverId', 'year', 'round']
+CHAVES = ['driverId', 'raceId', 'year', 'round']
+
+# Métrica → (coluna de origem, escala)
+METRICAS = {
+    'taxa_vitoria': ('win', 100),
+    'taxa_podio': ('is_podium', 100),
+    'chegada_media': ('positionOrder', 1),
+    'pontos_por_corrida': ('points', 1),
+}
+ORIGENS = [col for col, _ in METRICAS.values()]
+
+
+def _prepare(results, races):
+    rows = results[['raceId', 'driverId', 'positionOrder', 'points']].merge(
+        races[['raceId', 'year', 'round']], on='raceId', how='left')
+    rows['win'] = (rows['positionOrder'] == 1).astype(int)
+    rows['is_podium'] = (rows['positionOrder'] <= 3).astype(int)
+    return rows.sort_values(ORDEM, kind='stable')[CHAVES + ORIGENS]
+
+
+def _windows(rows, n, offset=0):
+    # `offset`: corridas do piloto anteriores à primeira linha de `rows`
+    g = rows.groupby('driverId', sort=False)
+    forma = rows.assign(race_count=offset + g.cumcount() + 1)
+    janela = np.minimum(forma['race_count'], n)
+    for nome, (col, escala) in METRICAS.items():
+        acum = g[col].cumsum()
+        soma = acum - acum.groupby(rows['driverId']).shift(n, fill_value=0)
+        forma[nome] = soma / janela * escala
+    return forma
+
+
+def build_form(results, races, n):
+    """Janela das últimas `n` corridas, para cada corrida de cada piloto."""
+    return _windows(_prepare(results, races), n).reset_index(drop=True)
+
+
+def extend_form(form, results, races, n):
+    """
+    Acrescenta corridas novas a uma tabela de `build_form` com o mesmo `n`.
+    Só as últimas `n` linhas de cada piloto afetado entram no cálculo.
+    """
+    novas = _prepare(results, races)
+    cauda = form[form['driverId'].isin(novas['driverId'])].groupby('driverId').tail(n)
+    anteriores = cauda.groupby('driverId')['race_count'].min() - 1
+
+    combinado = pd.concat([cauda[CHAVES + ORIGENS], novas], ignore_index=True)
+    offset = combinado['driverId'].map(anteriores).fillna(0).astype(int)
+    calculado = _windows(combinado, n, offset=offset).iloc[len(cauda):]
+    return pd.concat([form, calculado], ignore_index=True)
@@ -0,0 +1,175 @@
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+# Teste de carga local do app.py com o AppTest do Streamlit (sem navegador).
+#
+# Uso: python load_test.py --sessoes 1 2 4 8 --reruns 10 [--workers 4 --pool process]
+#
+# Cada sessão é um AppTest próprio rodando em uma thread, todas no mesmo
+# processo — como as sessões de uma única instância do servidor, compartilhando
+# os caches (st.cache_data / st.cache_resource). Cada rerun é uma ação:
+#   * filtro:   move o slider `filtro_anos` para um período aleatório;
+#   * capitulo: mexe em um widget de outro capítulo (janela/métrica da forma,
+#               sistema de pontuação). Trocar de aba em si é feito no navegador
+#               e não gera rerun, então é a interação dentro da aba que medimos;
+#   * botao:    aperta "Celebrar a Análise".
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+ANO_MIN, ANO_MAX = 2014, 2025
+
+
+def _rss_windows():
+    import ctypes
+    from ctypes import wintypes
+
+    class Contadores(ctypes.Structure):  # PROCESS_MEMORY_COUNTERS
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+            (nome, ctypes.c_size_t) for nome in (
+                'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+    kernel32 = ctypes.WinDLL('kernel32')
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    kernel32.K32GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(Contadores), wintypes.DWORD]
+    c = Contadores(cb=ctypes.sizeof(Contadores))
+    if not kernel32.K32GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(c), c.cb):
+        raise OSError(ctypes.get_last_error())
+    return c.WorkingSetSize
+
+
+def rss_mb():
+    # RSS atual no Linux (/proc) e no Windows (working set); no macOS e demais
+    # Unix, o pico do processo (ru_maxrss: bytes no macOS, KB nos outros).
+    # NaN se nada disso estiver disponível.
+    try:
+        if sys.platform == 'win32':
+            return _rss_windows() / 2**20
+        if os.path.exists('/proc/self/statm'):
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 2**20 if sys.platform == 'darwin' else pico / 1024
+    except (ImportError, OSError, AttributeError, ValueError):
+        return float('nan')
+
+
+def widget(lista, rotulo):
+    return next(w for w in lista if w.label.startswith(rotulo))
+
+
+def action(at, rng):
+    acao = rng.choice(['filtro', 'capitulo', 'botao'])
+    if acao == 'filtro':
+        inicio = rng.randint(ANO_MIN, ANO_MAX)
+        widget(at.slider, 'Período').set_value((inicio, rng.randint(inicio, ANO_MAX)))
+    elif acao == 'capitulo':
+        escolha = rng.choice(['janela', 'metrica', 'sistema'])
+        if escolha == 'janela':
+            campo = widget(at.select_slider, 'Janela')
+            campo.set_value(rng.choice([5, 10, 15, 20, 30]))
+        elif escolha == 'metrica':
+            widget(at.radio, 'Métrica').set_value(
+                rng.choice(['taxa_vitoria', 'taxa_podio', 'chegada_media', 'pontos_por_corrida']))
+        else:
+            campo = widget(at.selectbox, 'Sistema')
+            campo.set_value(rng.choice(campo.options))
+    else:
+        widget(at.button, '🎉').click()
+    return acao
+
+
+def session(semente, reruns, timeout, latencias, erros, barreira):
+    rng = random.Random(semente)
+    try:
+        at = AppTest.from_file(APP, default_timeout=timeout).run()
+        barreira.wait()
+        for _ in range(reruns):
+            action(at, rng)
+            inicio = time.perf_counter()
+            at.run()
+            latencias.append(time.perf_counter() - inicio)
+            erros.extend(e.value for e in at.exception)
+    except threading.BrokenBarrierError:
+        pass  # outra sessão falhou antes de abrir; o erro já foi registrado por ela
+    except Exception as e:
+        erros.append(f"{type(e).__name__}: {e}")
+        barreira.abort()  # não deixa a thread principal (e as demais sessões) presas na barreira
+
+
+def run_level(sessoes, reruns, timeout):
+    latencias, erros = [], []
+    barreira = threading.Barrier(sessoes + 1)
+    threads = [threading.Thread(target=session, args=(i, reruns, timeout, latencias, erros, barreira))
+               for i in range(sessoes)]
+    rss_inicio = rss_mb()
+    for t in threads:
+        t.start()
+    try:
+        barreira.wait()  # mede só os reruns, depois que todas as sessões abriram
+    except threading.BrokenBarrierError:
+        pass  # alguma sessão falhou ao abrir; o nível é reportado com os erros
+    inicio = time.perf_counter()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    ms = np.array(latencias) * 1000
+    percentil = lambda q: np.percentile(ms, q) if ms.size else float('nan')
+    rss_fim = rss_mb()
+    return {
+        'sessoes': sessoes,
+        'reruns': len(latencias),
+        'erros': len(erros),
+        'p50': percentil(50),
+        'p95': percentil(95),
+        'p99': percentil(99),
+        'vazao': len(latencias) / duracao,
+        'rss': rss_fim,
+        'delta_sessao': (rss_fim - rss_inicio) / sessoes,
+    }, erros
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga local do app.py")
+    parser.add_argument('--sessoes', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help="Níveis de sessões simultâneas")
+    parser.add_argument('--reruns', type=int, default=10, help="Reruns por sessão em cada nível")
+    parser.add_argument('--timeout', type=float, default=120, help="Timeout de cada rerun (s)")
+    parser.add_argument('--workers', type=int, help="DUELO_WORKERS do app (0 = sequencial)")
+    parser.add_argument('--pool', choices=['thread', 'process'], help="DUELO_POOL do app")
+    args = parser.parse_args()
+    if args.workers is not None:
+        os.environ['DUELO_WORKERS'] = str(args.workers)
+    if args.pool is not None:
+        os.environ['DUELO_POOL'] = args.pool
+
+    # Primeira execução: caches frios
+    rss_inicio = rss_mb()
+    inicio = time.perf_counter()
+    at = AppTest.from_file(APP, default_timeout=args.timeout).run()
+    print(f"Rerun frio: {(time.perf_counter() - inicio) * 1000:.0f} ms "
+          f"({len(at.exception)} erros), RSS {rss_inicio:.0f} → {rss_mb():.0f} MB\n")
+
+    print(f"{'sessões':>8} {'reruns':>7} {'erros':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'reruns/s':>9} {'RSS MB':>8} {'Δ/sessão':>9}")
+    falhas = []
+    for sessoes in args.sessoes:
+        r, erros = run_level(sessoes, args.reruns, args.timeout)
+        falhas.extend(erros)
+        print(f"{r['sessoes']:>8} {r['reruns']:>7} {r['erros']:>6} {r['p50']:>8.0f} {r['p95']:>8.0f} "
+              f"{r['p99']:>8.0f} {r['vazao']:>9.2f} {r['rss']:>8.0f} {r['delta_sessao']:>8.1f}M")
+
+    for erro in dict.fromkeys(falhas):
+        print(f"\nErro: {erro}")
+
+
+if __name__ == '__main__':
+    main()
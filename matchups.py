@@ -0,0 +1,282 @@
+"""
+Loja offline de confrontos pré-calculados entre os pilotos mais experientes.
+
+Para os `top_n` pilotos com mais largadas guardamos, por piloto e temporada,
+os agregados dos capítulos (trajetória, histograma de ganho de posições,
+pontos, conversão por largada) e, para cada par, o confronto direto nas
+corridas em que ambos largaram. Um confronto qualquer vira duas buscas por
+chave nos blocos dos pilotos e uma no bloco do par.
+
+Formato do arquivo (um único arquivo, mapeável em memória):
+
+    MAGIC | tamanho do cabeçalho (uint64) | cabeçalho JSON | colunas
+
+Cada tabela é guardada por colunas (int32/float32), ordenada pela chave, e o
+cabeçalho traz o offset de cada coluna e o intervalo de linhas de cada chave.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+ARQUIVO = 'matchups.bin'
+MAGIC = b'DUELO01\n'
+ALINHAMENTO = 64
+TOP_N = 30
+# Chave do par (a, b) com a < b: a * FATOR_PAR + b
+FATOR_PAR = 100_000
+
+# Tabela → coluna-chave
+CHAVES = {'traj': 'driverId', 'pos_hist': 'driverId', 'pontos': 'driverId', 'grid': 'driverId', 'h2h': 'par'}
+
+
+def fingerprint(results, sprint_results, races):
+    """Linhas de resultado e de sprint por temporada: muda quando entra uma etapa nova."""
+    anos = races.set_index('raceId')['year']
+    contagem = lambda df: df['raceId'].map(anos).value_counts()
+    tabela = pd.concat([contagem(results), contagem(sprint_results)], axis=1).fillna(0).astype(int)
+    return {str(ano): [int(n) for n in linha] for ano, linha in tabela.sort_index().iterrows()}
+
+
+def stale_seasons(meta, temporadas):
+    """Temporadas cujo conteúdo difere do que a loja guardou."""
+    if 'temporadas' not in meta:
+        # Loja sem impressão digital: refaz a última temporada guardada e as seguintes
+        return {int(ano) for ano in temporadas if int(ano) >= meta['ano_max']}
+    return {int(ano) for ano, linhas in temporadas.items() if meta['temporadas'].get(ano) != linhas}
+
+
+def notable_drivers(results, top_n=TOP_N):
+    """Os `top_n` pilotos com mais largadas (empates pelo menor driverId)."""
+    largadas = results.groupby('driverId').size().rename('n').reset_index()
+    largadas = largadas.sort_values(['n', 'driverId'], ascending=[False, True])
+    return sorted(largadas['driverId'].head(top_n).tolist())
+
+
+# ==========================================
+# AGREGADOS
+# ==========================================
+def driver_blocks(results, sprint_results, races, driver_ids):
+    """Tabelas por (piloto, temporada) dos pilotos em `driver_ids`."""
+    corridas = races[['raceId', 'year', 'round']]
+    rows = results[results['driverId'].isin(driver_ids)].merge(corridas, on='raceId', how='left')
+    rows = rows.sort_values(['driverId', 'year', 'round'], kind='stable')
+    rows['win'] = (rows['positionOrder'] == 1).astype(int)
+    rows['is_podium'] = (rows['positionOrder'] <= 3).astype(int)
+
+    # Vitória por corrida; o acumulado é refeito no recorte de anos escolhido
+    traj = rows[['driverId', 'year', 'round', 'win']]
+
+    com_grid = rows[rows['grid'] > 0]
+    pos_hist = (com_grid.assign(pos_change=com_grid['grid'] - com_grid['positionOrder'])
+                        .groupby(['driverId', 'year', 'pos_change']).size().rename('n').reset_index())
+
+    sprints = sprint_results[sprint_results['driverId'].isin(driver_ids)].merge(corridas, on='raceId', how='left')
+    pontos = (pd.concat([rows[['driverId', 'year', 'points']], sprints[['driverId', 'year', 'points']]])
+                .groupby(['driverId', 'year'])['points'].sum().rename('pontos').reset_index())
+
+    grid = rows.groupby(['driverId', 'year', 'grid']).agg(
+        largadas=('raceId', 'count'),
+        podios=('is_podium', 'sum'),
+        vitorias=('win', 'sum'),
+    ).reset_index()
+
+    return {'traj': traj, 'pos_hist': pos_hist, 'pontos': pontos, 'grid': grid}
+
+
+def head_to_head(results, races, driver_ids, pares):
+    """Corridas em comum e quem terminou à frente, por par e temporada."""
+    rows = results.loc[results['driverId'].isin(driver_ids), ['raceId', 'driverId', 'positionOrder']]
+    duelo = rows.merge(rows, on='raceId', suffixes=('_a', '_b'))
+    duelo = duelo[duelo['driverId_a'] < duelo['driverId_b']]
+    duelo['par'] = duelo['driverId_a'] * FATOR_PAR + duelo['driverId_b']
+    duelo = duelo[duelo['par'].isin(pares)].merge(races[['raceId', 'year']], on='raceId', how='left')
+    duelo['a_frente'] = (duelo['positionOrder_a'] < duelo['positionOrder_b']).astype(int)
+    duelo['b_frente'] = 1 - duelo['a_frente']
+    return duelo.groupby(['par', 'year']).agg(
+        corridas=('raceId', 'count'),
+        a_frente=('a_frente', 'sum'),
+        b_frente=('b_frente', 'sum'),
+    ).reset_index()
+
+
+def _chunk(args):
+    results, sprint_results, races, ids, pares = args
+    blocos = driver_blocks(results, sprint_results, races, ids)
+    blocos['h2h'] = head_to_head(results, races, set(pares // FATOR_PAR) | set(pares % FATOR_PAR), pares)
+    return blocos
+
+
+def compute_tables(results, sprint_results, races, driver_ids, pares, workers=1):
+    """Calcula as tabelas dos pilotos/pares pedidos, em paralelo por fatias de pilotos."""
+    fatias = [list(f) for f in np.array_split(np.array(driver_ids), max(1, workers)) if len(f)]
+    pares = np.array(sorted(pares), dtype=np.int64)
+    # Cada par fica com o piloto `a` se ele for recalculado, senão com o `b`
+    donos = np.where(np.isin(pares // FATOR_PAR, driver_ids), pares // FATOR_PAR, pares % FATOR_PAR)
+    tarefas = []
+    for ids in fatias:
+        # Cada fatia leva só as linhas e os pares que lhe cabem
+        meus_pares = pares[np.isin(donos, ids)]
+        envolvidos = set(ids) | set((meus_pares // FATOR_PAR).tolist()) | set((meus_pares % FATOR_PAR).tolist())
+        tarefas.append((results[results['driverId'].isin(envolvidos)],
+                        sprint_results[sprint_results['driverId'].isin(ids)], races, ids, meus_pares))
+
+    if workers > 1 and len(tarefas) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partes = list(pool.map(_chunk, tarefas))
+    else:
+        partes = [_chunk(t) for t in tarefas]
+    return {nome: pd.concat([p[nome] for p in partes], ignore_index=True) for nome in CHAVES}
+
+
+# ==========================================
+# ARQUIVO
+# ==========================================
+def _alinhar(n):
+    return -n % ALINHAMENTO
+
+
+def write_store(path, tabelas, meta):
+    """Grava as tabelas (ordenadas pela chave) com índice por chave em um único arquivo."""
+    cabecalho = {'meta': meta, 'tabelas': {}}
+    colunas, offset = [], 0
+    for nome, df in tabelas.items():
+        chave = CHAVES[nome]
+        df = df.sort_values([chave] + [c for c in df.columns if c != chave], kind='stable')
+        valores, inicios = np.unique(df[chave].to_numpy(), return_index=True)
+        fins = np.append(inicios[1:], len(df))
+        info = {'linhas': len(df), 'colunas': {},
+                'indice': {str(k): [int(i), int(f)] for k, i, f in zip(valores, inicios, fins)}}
+        for col in df.columns:
+            dtype = np.int64 if col == 'par' else (np.float32 if df[col].dtype.kind == 'f' else np.int32)
+            arr = np.ascontiguousarray(df[col].to_numpy(dtype=dtype))
+            info['colunas'][col] = {'dtype': np.dtype(dtype).str, 'offset': offset}
+            colunas.append(arr.tobytes() + b'\0' * _alinhar(arr.nbytes))
+            offset += arr.nbytes + _alinhar(arr.nbytes)
+        cabecalho['tabelas'][nome] = info
+
+    texto = json.dumps(cabecalho).encode('utf-8')
+    texto += b' ' * _alinhar(len(MAGIC) + 8 + len(texto))
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(texto)).tobytes())
+        f.write(texto)
+        for bloco in colunas:
+            f.write(bloco)
+    os.replace(tmp, path)
+
+
+class MatchupStore:
+    """Leitura por chave do arquivo de confrontos, mapeado em memória."""
+
+    def __init__(self, path):
+        self._mm = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(self._mm[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} não é uma loja de confrontos")
+        tamanho = int(np.frombuffer(self._mm, dtype=np.uint64, count=1, offset=len(MAGIC))[0])
+        inicio = len(MAGIC) + 8
+        cabecalho = json.loads(bytes(self._mm[inicio:inicio + tamanho]))
+        self._dados = inicio + tamanho
+        self._tabelas = cabecalho['tabelas']
+        self.meta = cabecalho['meta']
+        self.nomes = {int(k): v for k, v in self.meta['nomes'].items()}
+
+    def _slice(self, nome, inicio, fim):
+        info = self._tabelas[nome]
+        cols = {}
+        for col, c in info['colunas'].items():
+            dtype = np.dtype(c['dtype'])
+            cols[col] = np.frombuffer(self._mm, dtype=dtype, count=fim - inicio,
+                                      offset=self._dados + c['offset'] + inicio * dtype.itemsize)
+        return pd.DataFrame(cols)
+
+    def lookup(self, nome, chave):
+        """Linhas da tabela `nome` para uma chave (vazio se não existir)."""
+        inicio, fim = self._tabelas[nome]['indice'].get(str(chave), (0, 0))
+        return self._slice(nome, inicio, fim)
+
+    def table(self, nome):
+        """Tabela inteira (usada na atualização incremental)."""
+        return self._slice(nome, 0, self._tabelas[nome]['linhas'])
+
+    def matchup(self, a, b):
+        """Agregados dos dois pilotos e o confronto direto, por busca de chave."""
+        a, b = sorted((a, b))
+        dados = {nome: pd.concat([self.lookup(nome, a), self.lookup(nome, b)], ignore_index=True)
+                 for nome in ('traj', 'pos_hist', 'pontos', 'grid')}
+        dados['h2h'] = self.lookup('h2h', a * FATOR_PAR + b).assign(a=a, b=b)
+        return dados
+
+
+# ==========================================
+# CONSTRUÇÃO
+# ==========================================
+def build_store(path, results, sprint_results, races, drivers, top_n=TOP_N, workers=1, full=False):
+    """
+    Cria ou atualiza o arquivo. Sem `full`, reaproveita os blocos de pilotos
+    que não correram nas temporadas alteradas (novas ou com etapas novas,
+    pela contagem de linhas por temporada) e recalcula só os afetados (e os
+    pares que os envolvem). Correções que não mudam a contagem de linhas
+    pedem `full`. Devolve a quantidade de pilotos recalculados.
+    """
+    ids = notable_drivers(results, top_n)
+    pares = {a * FATOR_PAR + b for a, b in combinations(ids, 2)}
+    anos = results[['raceId']].merge(races[['raceId', 'year']], on='raceId', how='left')['year']
+    nomes = drivers.set_index('driverId').loc[ids]
+    temporadas = fingerprint(results, sprint_results, races)
+    meta = {'top_n': top_n, 'ano_max': int(anos.max()), 'temporadas': temporadas,
+            'nomes': {str(i): f"{n['forename']} {n['surname']}" for i, n in nomes.iterrows()}}
+
+    anterior = None
+    if not full and os.path.exists(path):
+        anterior = MatchupStore(path)
+        if anterior.meta['top_n'] != top_n:
+            anterior = None
+
+    if anterior is None:
+        afetados = set(ids)
+    else:
+        # Pilotos com corridas nas temporadas alteradas, mais os que entraram no top N
+        alteradas = anos.isin(stale_seasons(anterior.meta, temporadas)).to_numpy()
+        afetados = set(results.loc[alteradas, 'driverId']) | (set(ids) - set(anterior.nomes))
+        afetados &= set(ids)
+        if not afetados:
+            if anterior.meta != meta:
+                # Só a impressão digital mudou (ex.: linhas de pilotos fora do top N)
+                tabelas = {nome: anterior.table(nome).copy() for nome in CHAVES}
+                del anterior
+                write_store(path, tabelas, meta)
+            return 0
+
+    pares_novos = {p for p in pares if p // FATOR_PAR in afetados or p % FATOR_PAR in afetados}
+    tabelas = compute_tables(results, sprint_results, races, sorted(afetados), pares_novos, workers)
+
+    if anterior is not None:
+        for nome, chave in CHAVES.items():
+            antigas = anterior.table(nome)
+            if chave == 'par':
+                mantidas = antigas[antigas['par'].isin(pares - pares_novos)]
+            else:
+                mantidas = antigas[antigas[chave].isin(set(ids) - afetados)]
+            tabelas[nome] = pd.concat([mantidas, tabelas[nome]], ignore_index=True)
+        del anterior, antigas  # libera o mapeamento antes de substituir o arquivo
+
+    write_store(path, tabelas, meta)
+    return len(afetados)
+
+
+def open_store(path, results, sprint_results, races, drivers, workers=1):
+    """Abre a loja, criando-a ou atualizando-a antes se estiver atrás dos dados."""
+    top_n = TOP_N
+    if os.path.exists(path):
+        loja = MatchupStore(path)
+        if not stale_seasons(loja.meta, fingerprint(results, sprint_results, races)):
+            return loja
+        top_n = loja.meta['top_n']  # mantém o tamanho escolhido em build_matchups.py
+        del loja
+    build_store(path, results, sprint_results, races, drivers, top_n=top_n, workers=workers)
+    return MatchupStore(path)
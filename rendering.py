@@ -0,0 +1,94 @@
+"""
+Renderização adaptativa dos gráficos grandes (dispersão e histograma).
+
+Abaixo de `LIMITE_PONTOS` o gráfico continua sendo enviado ponto a ponto.
+Acima disso, o servidor agrega os dados em caixas contadas e usa traces WebGL
+(`Scattergl`), de modo que o payload enviado ao navegador depende do número de
+caixas — e não do número de corridas. Com mais de `LIMITE_CORES` cores (muitos
+pilotos), as caixas de todas as cores são somadas em uma única densidade, para
+que o payload também não cresça com o número de pilotos.
+"""
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Acima deste número de pontos a dispersão passa a ser agregada no servidor
+LIMITE_PONTOS = 2000
+# Acima deste número de cores a agregação deixa de separar por cor
+LIMITE_CORES = 10
+COR_DENSIDADE = '#6B7280'
+
+
+def collapse_colors(df, color, limite_cores=LIMITE_CORES):
+    """Com mais de `limite_cores` valores em `color`, troca todos por um único grupo."""
+    cores = df[color].nunique()
+    if cores <= limite_cores:
+        return df, False
+    return df.assign(**{color: f"Todos ({cores})"}), True
+
+
+def bin_grid_finish(df, color, x='grid', y='positionOrder'):
+    """Conta as corridas em cada célula (cor, largada, chegada)."""
+    return df.groupby([color, x, y], observed=True).size().rename('corridas').reset_index()
+
+
+def scatter_grid_finish(df, color, color_map, labels, hover_data=None, x='grid', y='positionOrder',
+                        limite=LIMITE_PONTOS, limite_cores=LIMITE_CORES):
+    """Dispersão largada x chegada: pontos individuais ou caixas contadas (WebGL)."""
+    if len(df) <= limite:
+        try:
+            return px.scatter(df, x=x, y=y, color=color, color_discrete_map=color_map,
+                              hover_data=hover_data, labels=labels,
+                              trendline="ols") # Tenta adicionar linha de tendência
+        except Exception:
+            # Fallback seguro caso statsmodels falhe ou grid/dados sejam insuficientes
+            return px.scatter(df, x=x, y=y, color=color, color_discrete_map=color_map,
+                              hover_data=hover_data, labels=labels)
+
+    df, agregado = collapse_colors(df, color, limite_cores)
+    bins = bin_grid_finish(df, color, x, y)
+    escala = 40 / np.sqrt(bins['corridas'].max())
+    fig = go.Figure()
+    for nome, grupo in bins.groupby(color, observed=True, sort=True):
+        cor = COR_DENSIDADE if agregado else color_map.get(nome)
+        fig.add_trace(go.Scattergl(
+            x=grupo[x], y=grupo[y], mode='markers', name=str(nome),
+            marker=dict(size=np.sqrt(grupo['corridas']) * escala + 3, color=cor, opacity=0.6,
+                        line=dict(width=0)),
+            customdata=grupo['corridas'],
+            hovertemplate=f"{labels.get(x, x)}: %{{x}}<br>{labels.get(y, y)}: %{{y}}<br>Corridas: %{{customdata}}<extra>{nome}</extra>"))
+
+        # Tendência linear ponderada pela contagem de cada caixa
+        if grupo[x].nunique() > 1:
+            coef = np.polyfit(grupo[x], grupo[y], 1, w=np.sqrt(grupo['corridas']))
+            xs = np.array([grupo[x].min(), grupo[x].max()])
+            fig.add_trace(go.Scattergl(x=xs, y=np.polyval(coef, xs), mode='lines', showlegend=False,
+                                       line=dict(color=cor, width=2), hoverinfo='skip'))
+
+    fig.update_layout(xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y), legend_title_text=color)
+    return fig
+
+
+def histogram_binned(df, x, color, color_map, labels, nbins=30, opacity=0.7, limite_cores=LIMITE_CORES):
+    """Histograma sobreposto com as contagens calculadas no servidor; com muitas cores, uma só barra."""
+    valores = df[x].to_numpy()
+    if len(valores) == 0:
+        return go.Figure()
+
+    # Bordas inteiras compartilhadas entre as cores, como o histograma do plotly faria
+    lo, hi = np.floor(valores.min()), np.ceil(valores.max())
+    largura = max(1.0, np.ceil((hi - lo + 1) / nbins))
+    bordas = np.arange(lo - 0.5, hi + largura + 0.5, largura)
+    centros = (bordas[:-1] + bordas[1:]) / 2
+
+    df, agregado = collapse_colors(df, color, limite_cores)
+    fig = go.Figure()
+    for nome, grupo in df.groupby(color, observed=True, sort=True):
+        contagem, _ = np.histogram(grupo[x], bins=bordas)
+        fig.add_trace(go.Bar(x=centros, y=contagem, width=largura, name=str(nome),
+                             marker_color=COR_DENSIDADE if agregado else color_map.get(nome),
+                             opacity=opacity))
+
+    fig.update_layout(barmode='overlay', bargap=0,
+                      xaxis_title=labels.get(x, x), yaxis_title='count', legend_title_text=color)
+    return fig
@@ -0,0 +1,105 @@
+"""
+Motor de pontuação contrafactual: re-pontua todas as temporadas sob qualquer tabela.
+
+Os pontos gravados em `results.csv` seguem a regra de cada época (10-8-6 em
+2008, 25-18-15 depois). Aqui guardamos, para cada (piloto, temporada), um
+histograma de posições de chegada — corrida e sprint — e a contagem de voltas
+mais rápidas. Re-pontuar sob um novo sistema vira um produto matriz × vetor,
+o que torna a troca de sistema praticamente instantânea.
+
+Observação: o dataset só registra volta mais rápida (`rank`) a partir de 2004.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Maior posição de chegada considerada nos histogramas
+MAX_POS = 40
+
+PONTOS_25 = {1: 25, 2: 18, 3: 15, 4: 12, 5: 10, 6: 8, 7: 6, 8: 4, 9: 2, 10: 1}
+SPRINT_8 = {1: 8, 2: 7, 3: 6, 4: 5, 5: 4, 6: 3, 7: 2, 8: 1}
+
+# Sistemas: pontos por posição (corrida e sprint) e bônus de volta mais rápida.
+# `vr_top10`: a volta mais rápida só pontua para quem termina entre os 10 primeiros.
+SISTEMAS = {
+    '1991-2002 (10-6-4-3-2-1)': {'corrida': {1: 10, 2: 6, 3: 4, 4: 3, 5: 2, 6: 1}, 'sprint': {}, 'volta_rapida': 0},
+    '2003-2009 (10-8-6-5-4-3-2-1)': {'corrida': {1: 10, 2: 8, 3: 6, 4: 5, 5: 4, 6: 3, 7: 2, 8: 1}, 'sprint': {}, 'volta_rapida': 0},
+    '2010-2018 (25-18-15...)': {'corrida': PONTOS_25, 'sprint': {}, 'volta_rapida': 0},
+    '2022-2024 (sprint + volta rápida)': {'corrida': PONTOS_25, 'sprint': SPRINT_8, 'volta_rapida': 1, 'vr_top10': True},
+    '2025 (sprint, sem volta rápida)': {'corrida': PONTOS_25, 'sprint': SPRINT_8, 'volta_rapida': 0},
+}
+
+
+@dataclass
+class PositionHistograms:
+    index: pd.MultiIndex    # (driverId, year) de cada linha das matrizes
+    corrida: np.ndarray     # [piloto-temporada, posição] → chegadas
+    sprint: np.ndarray
+    vr: np.ndarray          # voltas mais rápidas
+    vr_top10: np.ndarray    # voltas mais rápidas terminando no top 10
+    originais: np.ndarray   # pontos gravados no dataset (regra da época)
+
+
+def _classified(rows, races):
+    # Apenas chegadas classificadas (`position` numérico) dentro de MAX_POS
+    rows = rows.merge(races[['raceId', 'year']], on='raceId', how='left')
+    rows = rows.assign(pos=pd.to_numeric(rows['position'], errors='coerce'))
+    return rows
+
+
+def _histogram(rows, index):
+    cls = rows[rows['pos'].between(1, MAX_POS)]
+    hist = np.zeros((len(index), MAX_POS + 1), dtype=np.int32)
+    linhas = index.get_indexer(pd.MultiIndex.from_frame(cls[['driverId', 'year']]))
+    np.add.at(hist, (linhas, cls['pos'].to_numpy(dtype=int)), 1)
+    return hist
+
+
+def build_histograms(results, sprint_results, races):
+    """Histogramas de posição por (piloto, temporada) para corridas e sprints."""
+    corridas = _classified(results, races)
+    sprints = _classified(sprint_results, races)
+    chaves = pd.concat([corridas[['driverId', 'year']], sprints[['driverId', 'year']]]).drop_duplicates()
+    index = pd.MultiIndex.from_frame(chaves.sort_values(['driverId', 'year']))
+
+    vr = corridas.assign(
+        vr=(pd.to_numeric(corridas['rank'], errors='coerce') == 1).astype(int))
+    vr = vr.assign(vr_top10=vr['vr'] * (vr['pos'] <= 10))
+    vr = vr.groupby(['driverId', 'year'])[['vr', 'vr_top10']].sum().reindex(index, fill_value=0)
+    originais = (pd.concat([corridas, sprints]).groupby(['driverId', 'year'])['points'].sum()
+                   .reindex(index, fill_value=0))
+
+    return PositionHistograms(
+        index=index,
+        corrida=_histogram(corridas, index),
+        sprint=_histogram(sprints, index),
+        vr=vr['vr'].to_numpy(),
+        vr_top10=vr['vr_top10'].to_numpy(),
+        originais=originais.to_numpy(),
+    )
+
+
+def _vector(tabela):
+    v = np.zeros(MAX_POS + 1)
+    for pos, pts in tabela.items():
+        v[pos] = pts
+    return v
+
+
+def score(hist, sistema=None):
+    """Total de pontos de cada (piloto, temporada) sob `sistema` (None = pontos originais)."""
+    if sistema is None:
+        return pd.DataFrame({'pontos': hist.originais}, index=hist.index).reset_index()
+
+    pontos = hist.corrida @ _vector(sistema['corrida']) + hist.sprint @ _vector(sistema['sprint'])
+    voltas = hist.vr_top10 if sistema.get('vr_top10', False) else hist.vr
+    pontos = pontos + voltas * sistema['volta_rapida']
+    return pd.DataFrame({'pontos': pontos}, index=hist.index).reset_index()
+
+
+def standings(totais):
+    """Posição de cada piloto no campeonato da temporada (empates dividem a posição)."""
+    totais = totais.copy()
+    totais['posicao'] = totais.groupby('year')['pontos'].rank(ascending=False, method='min').astype(int)
+    return totais
@@ -0,0 +1,97 @@
+"""
+Serialização compacta das figuras enviadas ao navegador.
+
+O `st.plotly_chart` envia a figura como JSON (`plotly.io.to_json`). O plotly já
+codifica arrays numpy inteiros como buffers binários tipados (`bdata` em base64),
+então aqui garantimos que os dados cheguem como arrays numpy no menor tipo
+possível e removemos o que é repetido a cada gráfico:
+
+* floats inteiros (pontos, contagens) viram inteiros — o plotly escolhe i1/i2/i4;
+* floats que cabem sem perda em float32 (centros de caixa como -22.5) viram f4;
+* listas Python de números viram arrays numpy (e portanto binários);
+* arrays de texto com um único valor repetido viram um escalar;
+* o template (`plotly_white` ocupa ~7 KB) fica só com os tipos de trace usados.
+"""
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Propriedades de dados de um trace que podem carregar arrays grandes
+CAMPOS_DADOS = ('x', 'y', 'z', 'customdata', 'text', 'hovertext')
+
+# Chaves do layout do template que só servem para subplots não cartesianos
+SUBPLOTS_ESPECIAIS = ('geo', 'polar', 'ternary', 'scene', 'mapbox', 'map')
+TRACES_CARTESIANOS = {'bar', 'scatter', 'scattergl', 'histogram', 'heatmap', 'box', 'violin'}
+
+
+def _compact_array(valor):
+    if isinstance(valor, (list, tuple)):
+        arr = np.asarray(valor)
+        if arr.dtype.kind not in 'iuf':
+            return valor
+    elif isinstance(valor, np.ndarray):
+        arr = valor
+    else:
+        return valor
+
+    if arr.dtype.kind == 'f' and arr.size and np.isfinite(arr).all():
+        if (arr == np.round(arr)).all():
+            return arr.astype(np.int64)
+        if (arr.astype(np.float32) == arr).all():
+            return arr.astype(np.float32)
+    return arr
+
+
+def _dedupe_text(valor):
+    # Um rótulo repetido em todos os pontos equivale ao mesmo rótulo escalar
+    if isinstance(valor, (list, tuple, np.ndarray)) and len(valor) > 1:
+        arr = np.asarray(valor, dtype=object)
+        if arr.ndim == 1 and all(isinstance(v, str) for v in arr) and (arr == arr[0]).all():
+            return arr[0]
+    return valor
+
+
+def _prune_template(fig):
+    template = fig.layout.template
+    if template is None:
+        return
+    usados = {trace.type for trace in fig.data}
+    dados = {tipo: getattr(template.data, tipo) for tipo in usados if getattr(template.data, tipo, None)}
+
+    layout = template.layout.to_plotly_json()
+    if usados <= TRACES_CARTESIANOS:
+        for chave in SUBPLOTS_ESPECIAIS:
+            layout.pop(chave, None)
+
+    fig.layout.template = go.layout.Template(layout=layout, data=dados)
+
+
+def _assign(obj, campo, valor):
+    # O plotly ignora a atribuição quando o valor novo é "igual" ao antigo
+    # ([1.0, 2.0] == array([1, 2])), então a propriedade é limpa antes
+    obj[campo] = None
+    obj[campo] = valor
+
+
+def compact_figure(fig):
+    """Reduz o payload da figura sem alterar o que é desenhado. Modifica `fig`."""
+    for trace in fig.data:
+        for campo in CAMPOS_DADOS:
+            valor = getattr(trace, campo, None)
+            if valor is None:
+                continue
+            if campo in ('text', 'hovertext'):
+                valor = _dedupe_text(valor)
+            _assign(trace, campo, _compact_array(valor))
+
+        marker = getattr(trace, 'marker', None)
+        if marker is not None and isinstance(getattr(marker, 'size', None), (list, tuple, np.ndarray)):
+            _assign(marker, 'size', np.asarray(marker.size, dtype=np.float32))
+
+    _prune_template(fig)
+    return fig
+
+
+def payload_size(fig):
+    """Tamanho em bytes do JSON que o Streamlit enviaria para esta figura."""
+    return len(pio.to_json(fig, validate=False).encode('utf-8'))
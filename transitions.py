@@ -0,0 +1,111 @@
+"""
+Matrizes de transição Largada (grid) → Chegada (positionOrder).
+
+As contagens são construídas em uma única passada sobre `results` e guardadas
+em formato longo esparso: apenas as células (piloto, temporada, grid, chegada)
+que realmente ocorreram, com a coluna `n`. Essa tabela de todos os pilotos é
+calculada uma vez; um recorte (pilotos, período) é só um filtro por chave
+seguido de `by_era`. A partir dela derivamos, sem voltar às linhas cruas, a
+matriz densa de qualquer piloto e as estatísticas por largada (chegada
+esperada, variância, chance de pódio) e o índice de resiliência.
+"""
+import pandas as pd
+
+# Eras de regulamento usadas para fatiar as matrizes (limites inclusivos à direita)
+ERAS_BINS = [1949, 2005, 2013, 2021, 2100]
+ERAS_LABELS = ['Clássica (até 2005)', 'V8 (2006-2013)', 'Híbrida (2014-2021)', 'Efeito Solo (2022+)']
+
+
+def build_transition_counts(results, races):
+    """Conta as transições grid → chegada de todos os pilotos, por temporada."""
+    base = results[['raceId', 'driverId', 'grid', 'positionOrder']].merge(
+        races[['raceId', 'year']], on='raceId', how='left')
+    return count_by_year(base)
+
+
+def count_by_year(rows):
+    """Células (piloto, temporada, grid, chegada) de linhas que trazem a coluna `year`."""
+    return rows.groupby(['driverId', 'year', 'grid', 'positionOrder']).size().rename('n').reset_index()
+
+
+def select_counts(counts_ano, driver_ids, anos):
+    """Recorte (pilotos, período) da tabela por temporada, já somado por era."""
+    sel = counts_ano[counts_ano['driverId'].isin(driver_ids) & counts_ano['year'].between(anos[0], anos[1])]
+    return by_era(sel)
+
+
+def by_era(counts_ano):
+    """Soma as contagens por temporada nas eras de regulamento."""
+    era = pd.cut(counts_ano['year'], bins=ERAS_BINS, labels=ERAS_LABELS)
+    return (counts_ano.assign(era=era)
+                      .groupby(['driverId', 'era', 'grid', 'positionOrder'], observed=True)['n']
+                      .sum().reset_index())
+
+
+def count_transitions(rows):
+    """Contagem por era direto de linhas que já trazem a coluna `year`."""
+    return by_era(count_by_year(rows))
+
+
+def transition_matrix(counts, driver_id, era=None, normalize=True):
+    """Matriz densa (linhas = largada, colunas = chegada) de um piloto."""
+    sel = counts[counts['driverId'] == driver_id]
+    if era is not None:
+        sel = sel[sel['era'] == era]
+    mat = sel.pivot_table(index='grid', columns='positionOrder', values='n',
+                          aggfunc='sum', fill_value=0)
+    if normalize and not mat.empty:
+        mat = mat.div(mat.sum(axis=1), axis=0)
+    return mat
+
+
+def _weighted(counts):
+    # Momentos ponderados pela contagem: somas suficientes para média/variância
+    pos = counts['positionOrder']
+    return counts.assign(
+        s1=counts['n'] * pos,
+        s2=counts['n'] * pos ** 2,
+        podios=counts['n'] * (pos <= 3),
+        vitorias=counts['n'] * (pos == 1),
+    )
+
+
+def _finish_moments(g):
+    g['chegada_esperada'] = g['s1'] / g['n']
+    g['variancia'] = g['s2'] / g['n'] - g['chegada_esperada'] ** 2
+    g['chance_podio'] = (g['podios'] / g['n']) * 100
+    g['chance_vitoria'] = (g['vitorias'] / g['n']) * 100
+    return g
+
+
+def grid_stats(counts, by=('driverId',)):
+    """Chegada esperada, variância e chances de pódio/vitória por largada."""
+    keys = list(by) + ['grid']
+    g = (_weighted(counts).groupby(keys, observed=True)[['n', 's1', 's2', 'podios', 'vitorias']]
+                          .sum().reset_index())
+    g = _finish_moments(g)
+    g['ganho_esperado'] = g['grid'] - g['chegada_esperada']
+    return g.drop(columns=['s1', 's2']).rename(columns={'n': 'largadas'})
+
+
+def resilience_scores(counts, by=('driverId',), min_grid=4):
+    """
+    Resumo por piloto (ou piloto/era). A `resiliencia` é a chance de pódio
+    largando de `min_grid` para trás — o mesmo recorte "fora do Top 3" do
+    capítulo Contexto. Largadas do pit lane (grid 0) ficam fora do ganho médio.
+    """
+    keys = list(by)
+    w = _weighted(counts)
+    geral = _finish_moments(w.groupby(keys, observed=True)[['n', 's1', 's2', 'podios', 'vitorias']]
+                             .sum().reset_index())
+
+    com_grid = w[w['grid'] > 0].assign(ganho=lambda x: x['n'] * (x['grid'] - x['positionOrder']))
+    ganho = com_grid.groupby(keys, observed=True)[['ganho', 'n']].sum()
+    ganho = (ganho['ganho'] / ganho['n']).rename('ganho_medio').reset_index()
+
+    fundo = w[w['grid'] >= min_grid].groupby(keys, observed=True)[['n', 'podios']].sum()
+    fundo = ((fundo['podios'] / fundo['n']) * 100).rename('resiliencia').reset_index()
+
+    resumo = geral.merge(ganho, on=keys, how='left').merge(fundo, on=keys, how='left')
+    resumo = resumo.drop(columns=['s1', 's2']).rename(columns={'n': 'largadas'})
+    return resumo